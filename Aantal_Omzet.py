@@ -1,8 +1,27 @@
 import streamlit as st
-import pandas as pd
 import io
 from datetime import datetime, date
 
+from inlezen import lees_excel
+from omzet_analyse import (
+    bouw_klant_maand_tabel,
+    lees_samenvatting_gestreamd,
+    maak_pivots,
+    maak_samenvatting,
+    selecteer_periode,
+    verwerk_status,
+)
+from opmaak import kolomopmaak
+from tabelweergave import toon_gepagineerd
+
+# Kolommen die dit rapport uit de export nodig heeft (zie inlezen.py)
+SCHEMA = {
+    "verplicht": ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status'],
+    "optioneel": ['Dossiernr'],
+    "dtype": {'Klantnaam': str},
+    "categorisch": ['Klantnaam'],
+}
+
 def app():
     st.title("Klantenoverzicht en Omzetanalyse")
 
@@ -15,71 +34,67 @@ def app():
 
     uploaded_file = st.file_uploader("Kies een Excel-bestand", type=["xlsx", "xls"])
 
+    # Bij zeer grote exports wordt het bestand blok per blok verwerkt, zodat het
+    # nooit volledig in het geheugen hoeft te passen (enkel .xlsx).
+    gestreamd = st.checkbox(
+        "Zeer groot bestand: gestreamd verwerken (beperkt geheugengebruik)",
+        help="Leest het bestand in blokken en houdt enkel de totalen per klant en maand "
+             "en de files met 'Prest. Eigen Bedrijf' = 0 bij.",
+    )
+
     if uploaded_file is not None:
         try:
-            # Lees het Excel-bestand in
-            df = pd.read_excel(uploaded_file)
-
-            # Controleer of de vereiste kolommen aanwezig zijn
-            required_columns = ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status']
-            # 'Dossiernr' is optioneel, dus controleren we die apart
-            if not all(col in df.columns for col in required_columns):
-                st.error(f"Het Excel-bestand moet de volgende kolommen bevatten: {', '.join(required_columns)}")
-                return
+            if gestreamd:
+                # Het gestreamde inlezen gaat niet via de cache van inlezen.py; de
+                # samenvatting wordt daarom per upload bewaard, zodat een andere
+                # datum in de sidebar het bestand niet opnieuw doorloopt.
+                bewaard = st.session_state.get("omzet_gestreamd")
+                if bewaard is not None and bewaard[0] == uploaded_file.file_id:
+                    samenvatting = bewaard[1]
+                else:
+                    samenvatting = lees_samenvatting_gestreamd(uploaded_file, SCHEMA)
+                    st.session_state["omzet_gestreamd"] = (uploaded_file.file_id, samenvatting)
+            else:
+                # Lees het Excel-bestand in
+                df = lees_excel(uploaded_file, SCHEMA)
+
+                # Controleer of de vereiste kolommen aanwezig zijn
+                required_columns = SCHEMA["verplicht"]
+                # 'Dossiernr' is optioneel, dus controleren we die apart
+                if not all(col in df.columns for col in required_columns):
+                    st.error(f"Het Excel-bestand moet de volgende kolommen bevatten: {', '.join(required_columns)}")
+                    return
 
-            # Filter de data: negeer rijen waar 'Dossier Fin. Status' 20 is voor alle volgende analyses
-            # Maak hier direct een kopie om waarschuwingen te voorkomen
-            df_processed = df[df['Dossier Fin. Status'] != 20].copy()
+                # Filter de data: negeer rijen waar 'Dossier Fin. Status' 20 is voor alle volgende analyses,
+                # zet 'Laaddatum' om naar datetime en voeg 'JaarMaand' toe
+                samenvatting = maak_samenvatting(verwerk_status(df))
 
-            if df_processed.empty:
+            if samenvatting["rijen"] == 0:
                 st.info("Na filtering op 'Dossier Fin. Status' (exclusief 20) zijn er geen gegevens meer om te analyseren.")
                 return # Stop de uitvoering als er geen data is na de filtering
 
-            # Zorg ervoor dat 'Laaddatum' een datetime object is voor de gehele df_processed
-            df_processed['Laaddatum'] = pd.to_datetime(df_processed['Laaddatum'])
-
             st.subheader("Overzicht per Klant en Maand (Exclusief Status 20)")
 
-            # Extraheer jaar en maand voor de eerste tabel
-            df_processed['JaarMaand'] = df_processed['Laaddatum'].dt.to_period('M')
-
-            # Aggregeer data met pivot_table
-            pivot_aantal = df_processed.pivot_table(index='Klantnaam', columns='JaarMaand', aggfunc='size', fill_value=0)
-            pivot_omzet = df_processed.pivot_table(index='Klantnaam', columns='JaarMaand', values='Prest. Eigen Bedrijf', aggfunc='sum', fill_value=0)
+            # Aantal files en omzet per klant en maand
+            pivot_aantal, pivot_omzet = maak_pivots(samenvatting)
 
             # Sorteer de maanden voor consistente kolomvolgorde
-            all_jaarmaanden = sorted(df_processed['JaarMaand'].unique())
+            all_jaarmaanden = sorted(pivot_aantal.columns)
 
-            # Bereid de kolommen voor het uiteindelijke DataFrame voor
-            final_columns_order = ['Klantnaam']
-            for jm in all_jaarmaanden:
-                final_columns_order.append(f"{jm.strftime('%Y-%m')} A")
-                final_columns_order.append(f"{jm.strftime('%Y-%m')} O")
-            
-            # Maak een leeg DataFrame met de juiste kolommen
-            result_df = pd.DataFrame(columns=final_columns_order)
-
-            # Vul het resultaat DataFrame
-            for klantnaam in df_processed['Klantnaam'].unique():
-                row_data = {'Klantnaam': klantnaam}
-                for jm in all_jaarmaanden:
-                    aantal = pivot_aantal.loc[klantnaam, jm] if jm in pivot_aantal.columns and klantnaam in pivot_aantal.index else 0
-                    omzet = pivot_omzet.loc[klantnaam, jm] if jm in pivot_omzet.columns and klantnaam in pivot_omzet.index else 0
-                    row_data[f"{jm.strftime('%Y-%m')} A"] = aantal
-                    row_data[f"{jm.strftime('%Y-%m')} O"] = omzet
-                
-                result_df = pd.concat([result_df, pd.DataFrame([row_data])], ignore_index=True)
+            # Eén rij per klant, met per maand het aantal files (A) en de omzet (O)
+            result_df = bouw_klant_maand_tabel(pivot_aantal, pivot_omzet, samenvatting["klanten"], all_jaarmaanden)
 
             # Hernoem de eerste kolom
             result_df = result_df.rename(columns={'Klantnaam': 'Klant'})
             
-            # Toon de eerste tabel
-            st.dataframe(result_df, hide_index=True)
+            # Toon de eerste tabel, met de omzet als valuta
+            opmaak = {f"{jm.strftime('%Y-%m')} O": "euro" for jm in all_jaarmaanden}
+            st.dataframe(result_df, hide_index=True, column_config=kolomopmaak(opmaak))
 
             st.subheader("Files met 'Prest. Eigen Bedrijf' = 0 (Exclusief Status 20)")
 
-            # Filter de *reeds gefilterde* data (df_processed) voor rijen waar 'Prest. Eigen Bedrijf' 0 is
-            df_zero_omzet = df_processed[df_processed['Prest. Eigen Bedrijf'] == 0].copy()
+            # Rijen (na filtering op status 20) waar 'Prest. Eigen Bedrijf' 0 is
+            df_zero_omzet = samenvatting["nul_omzet"]
 
             if df_zero_omzet.empty:
                 st.info("Geen files gevonden met 'Prest. Eigen Bedrijf' = 0 na filtering op status 20.")
@@ -87,9 +102,9 @@ def app():
                 # Datumfilter voor de tweede tabel
                 st.sidebar.subheader("Filter voor Files met 0 Omzet")
                 
-                # Bepaal de minimale en maximale datum in de data voor de datumselector
-                min_date = df_zero_omzet['Laaddatum'].min().date()
-                max_date = df_zero_omzet['Laaddatum'].max().date()
+                # Eerste en laatste datum (de rijen zijn gesorteerd) voor de datumselector
+                min_date = df_zero_omzet['Laaddatum'].iloc[0].date()
+                max_date = df_zero_omzet['Laaddatum'].iloc[-1].date()
 
                 # Datum input velden
                 start_date = st.sidebar.date_input("Startdatum", min_value=min_date, max_value=max_date, value=min_date)
@@ -100,11 +115,8 @@ def app():
                     st.sidebar.error("Einddatum kan niet voor startdatum liggen.")
                     return
 
-                # Filter de df_zero_omzet op de geselecteerde periode
-                df_zero_omzet_filtered_by_date = df_zero_omzet[
-                    (df_zero_omzet['Laaddatum'].dt.date >= start_date) &
-                    (df_zero_omzet['Laaddatum'].dt.date <= end_date)
-                ].copy()
+                # Filter de df_zero_omzet (gesorteerd op Laaddatum) op de geselecteerde periode
+                df_zero_omzet_filtered_by_date = selecteer_periode(df_zero_omzet, start_date, end_date)
 
                 if df_zero_omzet_filtered_by_date.empty:
                     st.info(f"Geen files gevonden met 'Prest. Eigen Bedrijf' = 0 in de periode van {start_date} tot {end_date}.")
@@ -116,7 +128,7 @@ def app():
                     if 'Dossiernr' in df_zero_omzet_filtered_by_date.columns:
                         display_columns_zero_omzet.insert(0, 'Dossiernr') # Voeg 'Dossiernr' vooraan toe
 
-                    st.dataframe(df_zero_omzet_filtered_by_date[display_columns_zero_omzet], hide_index=True)
+                    toon_gepagineerd(df_zero_omzet_filtered_by_date[display_columns_zero_omzet], "nul_omzet", hide_index=True)
 
         except Exception as e:
             st.error(f"Er is een fout opgetreden bij het verwerken van het bestand: {e}")
@@ -3,6 +3,124 @@ import pandas as pd
 import io
 from datetime import datetime, date
 
+from inlezen import lees_excel_bestanden
+from omzet_analyse import (
+    Ontdubbelaar,
+    bouw_klant_maand_tabel,
+    combineer_samenvattingen,
+    lees_samenvatting_gestreamd,
+    maak_kubus,
+    maak_samenvatting,
+    selecteer_periode,
+    verwerk_status,
+)
+from omzet_historiek import (
+    beschikbaar as historiek_beschikbaar,
+    historiek_overzicht,
+    historiek_versie,
+    lees_samenvatting,
+    voeg_toe,
+    wis_historiek,
+)
+from opmaak import kolomopmaak
+from tabelweergave import toon_gepagineerd
+
+# Kolommen die dit rapport uit de export nodig heeft (zie inlezen.py)
+SCHEMA = {
+    "verplicht": ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status'],
+    "optioneel": ['Dossiernr'],
+    "dtype": {'Klantnaam': str},
+    "categorisch": ['Klantnaam'],
+}
+
+
+def toon_melding(soort, tekst):
+    getattr(st, soort)(tekst)
+
+
+def bewaar_in_historiek(uploaded_files, meld):
+    """Voegt de uploads die in deze sessie nog niet bewaard werden toe aan
+    de historiek; de ongewijzigde maanden worden niet opnieuw berekend."""
+    toegevoegd = st.session_state.setdefault("historiek_toegevoegd", set())
+    nieuwe_bestanden = [f for f in uploaded_files if f.file_id not in toegevoegd]
+    if not nieuwe_bestanden:
+        return
+    resultaten = lees_excel_bestanden(nieuwe_bestanden, SCHEMA)
+    for uploaded_file, (df_single, fout) in zip(nieuwe_bestanden, resultaten):
+        try:
+            if fout is not None:
+                raise ValueError(fout)
+            telling = voeg_toe(df_single)
+        except Exception as e:
+            meld("warning", f"Kon bestand '{uploaded_file.name}' niet bewaren: {e}. Dit bestand wordt overgeslagen.")
+            continue
+        toegevoegd.add(uploaded_file.file_id)
+        meld("success", f"'{uploaded_file.name}': {telling['nieuw']} nieuwe en {telling['vervangen']} vervangen files bewaard.")
+
+
+def lees_uploads(uploaded_files, gestreamd, meld):
+    """Samenvatting (zie omzet_analyse.py) van alle geüploade bestanden, of
+    None als er niets bruikbaars in zat (de fout is dan al gemeld)."""
+    def meld_dubbels(naam, aantal):
+        if aantal:
+            meld("info", f"'{naam}': {aantal} files die al in een eerder bestand zaten, werden weggelaten.")
+
+    # Files die al in een eerder bestand zaten, worden niet dubbel geteld
+    ontdubbelaar = Ontdubbelaar()
+
+    if gestreamd:
+        samenvattingen = []
+        for uploaded_file in uploaded_files:
+            try:
+                samenvattingen.append(lees_samenvatting_gestreamd(uploaded_file, SCHEMA, ontdubbelaar=ontdubbelaar))
+            except Exception as e:
+                ontdubbelaar.volgend_bestand(meetellen=False)
+                meld("warning", f"Kon bestand '{uploaded_file.name}' niet lezen: {e}. Dit bestand wordt overgeslagen.")
+                continue
+            meld_dubbels(uploaded_file.name, ontdubbelaar.volgend_bestand())
+
+        if not samenvattingen:
+            st.error("Geen geldig Excel-bestand gevonden om te verwerken.")
+            return None
+
+        return combineer_samenvattingen(samenvattingen)
+
+    # --- Combineer alle geüploade bestanden ---
+    # Bestanden die nog niet in de cache zitten worden parallel ingelezen
+    voortgang = st.progress(0.0, text="Bestanden inlezen...")
+
+    def meld_voortgang(klaar, totaal):
+        voortgang.progress(klaar / totaal, text=f"{klaar} van {totaal} bestanden ingelezen")
+
+    resultaten = lees_excel_bestanden(uploaded_files, SCHEMA, meld_voortgang)
+    voortgang.empty()
+
+    all_dfs = []
+    for uploaded_file, (df_single, fout) in zip(uploaded_files, resultaten):
+        if fout is not None:
+            meld("warning", f"Kon bestand '{uploaded_file.name}' niet lezen: {fout}. Dit bestand wordt overgeslagen.")
+            continue # Ga door naar het volgende bestand
+        all_dfs.append(ontdubbelaar.filter(df_single))
+        meld_dubbels(uploaded_file.name, ontdubbelaar.volgend_bestand())
+
+    if not all_dfs:
+        st.error("Geen geldig Excel-bestand gevonden om te verwerken.")
+        return None
+
+    df = pd.concat(all_dfs, ignore_index=True)
+
+    # Controleer of de vereiste kolommen aanwezig zijn in de gecombineerde DataFrame
+    required_columns = SCHEMA["verplicht"]
+    if not all(col in df.columns for col in required_columns):
+        missing_cols = [col for col in required_columns if col not in df.columns]
+        st.error(f"Een of meer geüploade Excel-bestanden missen de volgende vereiste kolommen: {', '.join(missing_cols)}")
+        return None
+
+    # Filter de data: negeer rijen waar 'Dossier Fin. Status' 20 is voor alle volgende analyses,
+    # zet 'Laaddatum' om naar datetime en voeg 'JaarMaand' toe
+    return maak_samenvatting(verwerk_status(df))
+
+
 def app():
     st.title("Klantenoverzicht en Omzetanalyse")
 
@@ -18,54 +136,86 @@ def app():
     # --- Upload meerdere bestanden ---
     uploaded_files = st.file_uploader("Kies een of meerdere Excel-bestanden", type=["xlsx", "xls"], accept_multiple_files=True)
 
-    if not uploaded_files:
+    # Met de historiek worden uploads lokaal bewaard (per maand), zodat vorige
+    # maanden niet opnieuw geüpload moeten worden (zie omzet_historiek.py).
+    historiek = historiek_beschikbaar() and st.checkbox(
+        "Historiek gebruiken: uploads bewaren en alle bewaarde maanden tonen",
+        help="Nieuwe exports worden toegevoegd aan de bewaarde maanden; files die al bewaard "
+             "waren (zelfde 'Dossiernr') worden vervangen door de nieuwe versie.",
+    )
+
+    if historiek:
+        with st.expander("Bewaarde historiek"):
+            st.dataframe(historiek_overzicht(), hide_index=True)
+            if st.button("Historiek wissen"):
+                wis_historiek()
+                st.session_state.pop("historiek_toegevoegd", None)
+                st.rerun()
+        if not uploaded_files and not historiek_versie():
+            st.info("Upload uw Excel-bestand(en) om de historiek te starten.")
+            return
+    elif not uploaded_files:
         st.info("Upload uw Excel-bestand(en) om te beginnen.")
         return
 
+    # Bij zeer grote exports wordt elk bestand blok per blok verwerkt, zodat het
+    # nooit volledig in het geheugen hoeft te passen (enkel .xlsx).
+    gestreamd = not historiek and st.checkbox(
+        "Zeer grote bestanden: gestreamd verwerken (beperkt geheugengebruik)",
+        help="Leest de bestanden in blokken en houdt enkel de totalen per klant en maand "
+             "en de files met 'Prest. Eigen Bedrijf' = 0 bij.",
+    )
+
     # The main try-except block now wraps all file processing
     try:
-        # --- Combineer alle geüploade bestanden ---
-        all_dfs = []
-        for uploaded_file in uploaded_files:
-            try:
-                df_single = pd.read_excel(uploaded_file)
-                all_dfs.append(df_single)
-            except Exception as e:
-                st.warning(f"Kon bestand '{uploaded_file.name}' niet lezen: {e}. Dit bestand wordt overgeslagen.")
-                continue # Ga door naar het volgende bestand
-
-        if not all_dfs:
-            st.error("Geen geldig Excel-bestand gevonden om te verwerken.")
-            return
+        # De kubus (zie maak_kubus) wordt één keer per dataset berekend; de
+        # filters in de sidebar nemen er enkel een deel uit. Meldingen van het
+        # inlezen worden bewaard, zodat ze bij elke herberekening zichtbaar blijven.
+        if historiek:
+            bewaar_in_historiek(uploaded_files or [], toon_melding)
+            sleutel = ("historiek", historiek_versie())
+        else:
+            sleutel = (tuple(f.file_id for f in uploaded_files), gestreamd)
 
-        df = pd.concat(all_dfs, ignore_index=True)
+        bewaard = st.session_state.get("omzet_kubus")
+        if bewaard is not None and bewaard[0] == sleutel:
+            _, kubus, meldingen = bewaard
+            for soort, tekst in meldingen:
+                toon_melding(soort, tekst)
+        else:
+            meldingen = []
 
-        # Controleer of de vereiste kolommen aanwezig zijn in de gecombineerde DataFrame
-        required_columns = ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status']
-        if not all(col in df.columns for col in required_columns):
-            missing_cols = [col for col in required_columns if col not in df.columns]
-            st.error(f"Een of meer geüploade Excel-bestanden missen de volgende vereiste kolommen: {', '.join(missing_cols)}")
-            return
+            def meld(soort, tekst):
+                meldingen.append((soort, tekst))
+                toon_melding(soort, tekst)
 
-        # Filter de data: negeer rijen waar 'Dossier Fin. Status' 20 is voor alle volgende analyses
-        df_processed = df[df['Dossier Fin. Status'] != 20].copy()
+            if historiek:
+                samenvatting = lees_samenvatting()
+                if samenvatting is None:
+                    st.error("Geen geldig Excel-bestand gevonden om te verwerken.")
+                    return
+            else:
+                samenvatting = lees_uploads(uploaded_files, gestreamd, meld)
+                if samenvatting is None:
+                    return
 
-        if df_processed.empty:
-            st.info("Na filtering op 'Dossier Fin. Status' (exclusief 20) zijn er geen gegevens meer om te analyseren.")
-            return
+            if samenvatting["rijen"] == 0:
+                st.info("Na filtering op 'Dossier Fin. Status' (exclusief 20) zijn er geen gegevens meer om te analyseren.")
+                return
 
-        # Zorg ervoor dat 'Laaddatum' een datetime object is voor de gehele df_processed
-        df_processed['Laaddatum'] = pd.to_datetime(df_processed['Laaddatum'])
+            # Aantal files en omzet per klant en maand
+            kubus = maak_kubus(samenvatting)
+            st.session_state["omzet_kubus"] = (sleutel, kubus, meldingen)
 
-        # Extraheer jaar en maand voor de tabellen
-        df_processed['JaarMaand'] = df_processed['Laaddatum'].dt.to_period('M')
+        pivot_aantal, pivot_omzet = kubus["pivot_aantal"], kubus["pivot_omzet"]
+        all_jaarmaanden = kubus["jaarmaanden"]
 
         # --- Filtering voor Tabel 1 in de sidebar ---
         st.sidebar.subheader("Filter voor Hoofdrapport (Tabel 1)")
         
         # Bepaal alle unieke jaren en maanden in de data
-        all_years = sorted(df_processed['Laaddatum'].dt.year.unique())
-        all_months = sorted(df_processed['Laaddatum'].dt.month.unique())
+        all_years = sorted({jm.year for jm in all_jaarmaanden})
+        all_months = sorted({jm.month for jm in all_jaarmaanden})
 
         # Formatteer maanden naar namen voor de dropdown
         month_names = {
@@ -77,7 +227,7 @@ def app():
         selected_year_t1 = st.sidebar.selectbox("Selecteer Jaar (Tabel 1)", all_years, index=len(all_years)-1 if all_years else 0)
         
         # Filter de maanden die beschikbaar zijn voor het geselecteerde jaar
-        available_months_in_selected_year = sorted(df_processed[df_processed['Laaddatum'].dt.year == selected_year_t1]['Laaddatum'].dt.month.unique())
+        available_months_in_selected_year = sorted({jm.month for jm in all_jaarmaanden if jm.year == selected_year_t1})
         selected_month_names = [month_names[m] for m in available_months_in_selected_year] # Standaard alle maanden in dat jaar
 
         selected_months_t1_str = st.sidebar.multiselect(
@@ -103,12 +253,8 @@ def app():
 
         st.subheader("Overzicht per Klant en Maand (Exclusief Status 20)")
 
-        # Aggregeer data met pivot_table
-        pivot_aantal = df_processed.pivot_table(index='Klantnaam', columns='JaarMaand', aggfunc='size', fill_value=0)
-        pivot_omzet = df_processed.pivot_table(index='Klantnaam', columns='JaarMaand', values='Prest. Eigen Bedrijf', aggfunc='sum', fill_value=0)
-
-        # Bereken het maximum aantal files per klant over alle maanden in de GEFILTERDE data (voor consistentie)
-        max_files_per_klant = pivot_aantal.max(axis=1)
+        # Maximum aantal files per klant over alle maanden
+        max_files_per_klant = kubus["max_per_klant"]
 
         # --- Filter: Minimaal maximum aantal files per klant ---
         # Bepaal min/max voor de slider
@@ -129,51 +275,31 @@ def app():
         # Filter de klanten op basis van de geselecteerde minimale maximum files
         filtered_klantnamen = max_files_per_klant[max_files_per_klant >= min_max_files_filter].index.tolist()
 
-        # Bereid de kolommen voor het uiteindelijke DataFrame voor
-        # We tonen alleen de geselecteerde maanden
-        final_columns_order_t1 = ['Klantnaam']
-        
         # Check of er gefilterde jaarmaanden zijn EN of er gefilterde klanten zijn
         if not filtered_jaarmaanden_t1 or not filtered_klantnamen:
             st.info("Selecteer minimaal één maand en/of pas het filter voor 'Minimaal Max Files per Klant' aan voor het hoofdrapport.")
             st.dataframe(pd.DataFrame(columns=['Klant'])) # Toon een lege dataframe
         else:
-            for jm in filtered_jaarmaanden_t1:
-                final_columns_order_t1.append(f"{jm.strftime('%Y-%m')} A")
-                final_columns_order_t1.append(f"{jm.strftime('%Y-%m')} O")
-                final_columns_order_t1.append(f"{jm.strftime('%Y-%m')} P") # Nieuwe kolom voor percentage
-            
-            # Maak een leeg DataFrame met de juiste kolommen
-            result_df = pd.DataFrame(columns=final_columns_order_t1)
-
-            # Vul het resultaat DataFrame, maar alleen voor de gefilterde klanten
-            for klantnaam in filtered_klantnamen: # Loop nu over de gefilterde klantnamen
-                row_data = {'Klantnaam': klantnaam}
-                max_files = max_files_per_klant.get(klantnaam, 0) # Haal de max files voor deze klant op
-                
-                for jm in filtered_jaarmaanden_t1:
-                    # Zorg ervoor dat de maand daadwerkelijk in pivot_aantal/omzet voorkomt voordat je opzoekt
-                    aantal = pivot_aantal.loc[klantnaam, jm] if jm in pivot_aantal.columns and klantnaam in pivot_aantal.index else 0
-                    omzet = pivot_omzet.loc[klantnaam, jm] if jm in pivot_omzet.columns and klantnaam in pivot_omzet.index else 0
-                    
-                    percentage = (aantal / max_files * 100) if max_files > 0 else 0 # Bereken percentage
-                    
-                    row_data[f"{jm.strftime('%Y-%m')} A"] = aantal
-                    row_data[f"{jm.strftime('%Y-%m')} O"] = f"€{omzet:,.2f}" # Opmaak als valuta
-                    row_data[f"{jm.strftime('%Y-%m')} P"] = f"{percentage:,.0f} %" # Opmaak als percentage zonder decimalen
-
-                result_df = pd.concat([result_df, pd.DataFrame([row_data])], ignore_index=True)
+            # Per geselecteerde maand: aantal (A), omzet (O) en percentage van het maximum van de klant (P)
+            result_df = bouw_klant_maand_tabel(
+                pivot_aantal, pivot_omzet, filtered_klantnamen, filtered_jaarmaanden_t1, max_files_per_klant
+            )
 
             # Hernoem de eerste kolom
             result_df = result_df.rename(columns={'Klantnaam': 'Klant'})
-            
-            # Toon de eerste tabel
-            st.dataframe(result_df, hide_index=True)
+
+            # Toon de eerste tabel; omzet als valuta en percentage zonder decimalen,
+            # de kolommen zelf blijven numeriek (en dus correct sorteerbaar)
+            opmaak = {}
+            for jm in filtered_jaarmaanden_t1:
+                opmaak[f"{jm.strftime('%Y-%m')} O"] = "euro"
+                opmaak[f"{jm.strftime('%Y-%m')} P"] = "procent"
+            st.dataframe(result_df, hide_index=True, column_config=kolomopmaak(opmaak))
 
         st.subheader("Files met 'Prest. Eigen Bedrijf' = 0 (Exclusief Status 20)")
 
-        # Filter de *reeds gefilterde* data (df_processed) voor rijen waar 'Prest. Eigen Bedrijf' 0 is
-        df_zero_omzet = df_processed[df_processed['Prest. Eigen Bedrijf'] == 0].copy()
+        # Rijen (na filtering op status 20) waar 'Prest. Eigen Bedrijf' 0 is
+        df_zero_omzet = kubus["nul_omzet"]
 
         if df_zero_omzet.empty:
             st.info("Geen files gevonden met 'Prest. Eigen Bedrijf' = 0 na filtering op status 20.")
@@ -181,9 +307,9 @@ def app():
             # Datumfilter voor de tweede tabel
             st.sidebar.subheader("Filter voor Files met 0 Omzet")
             
-            # Bepaal de minimale en maximale datum in de data voor de datumselector
-            min_date_t2 = df_zero_omzet['Laaddatum'].min().date() if not df_zero_omzet.empty else date.today()
-            max_date_t2 = df_zero_omzet['Laaddatum'].max().date() if not df_zero_omzet.empty else date.today()
+            # Eerste en laatste datum (de rijen zijn gesorteerd) voor de datumselector
+            min_date_t2 = df_zero_omzet['Laaddatum'].iloc[0].date() if not df_zero_omzet.empty else date.today()
+            max_date_t2 = df_zero_omzet['Laaddatum'].iloc[-1].date() if not df_zero_omzet.empty else date.today()
 
             # Datum input velden
             start_date_t2 = st.sidebar.date_input("Startdatum (Tabel 2)", min_value=min_date_t2, max_value=max_date_t2, value=min_date_t2)
@@ -194,11 +320,8 @@ def app():
                 st.sidebar.error("Einddatum kan niet voor startdatum liggen.")
                 return
 
-            # Filter de df_zero_omzet op de geselecteerde periode
-            df_zero_omzet_filtered_by_date = df_zero_omzet[
-                (df_zero_omzet['Laaddatum'].dt.date >= start_date_t2) &
-                (df_zero_omzet['Laaddatum'].dt.date <= end_date_t2)
-            ].copy()
+            # Filter de df_zero_omzet (gesorteerd op Laaddatum) op de geselecteerde periode
+            df_zero_omzet_filtered_by_date = selecteer_periode(df_zero_omzet, start_date_t2, end_date_t2)
 
             if df_zero_omzet_filtered_by_date.empty:
                 st.info(f"Geen files gevonden met 'Prest. Eigen Bedrijf' = 0 in de periode van {start_date_t2} tot {end_date_t2}.")
@@ -210,12 +333,12 @@ def app():
                 if 'Dossiernr' in df_zero_omzet_filtered_by_date.columns:
                     display_columns_zero_omzet.insert(0, 'Dossiernr') # Voeg 'Dossiernr' vooraan toe
 
-                st.dataframe(df_zero_omzet_filtered_by_date[display_columns_zero_omzet], hide_index=True)
+                toon_gepagineerd(df_zero_omzet_filtered_by_date[display_columns_zero_omzet], "nul_omzet", hide_index=True)
 
         st.subheader("Totaal aantal files per maand (Exclusief Status 20)")
 
-        # Bereken het totaal aantal files per JaarMaand (op basis van df_processed)
-        total_files_per_month = df_processed['JaarMaand'].value_counts().sort_index()
+        # Totaal aantal files per JaarMaand (na filtering op status 20)
+        total_files_per_month = kubus["per_maand"]
 
         if total_files_per_month.empty:
             st.info("Geen totale files per maand om te tonen na filtering op status 20.")
@@ -1,51 +1,106 @@
 import streamlit as st
 import pandas as pd
 
+from inlezen import lees_excel_bestanden, ontbrekende_kolommen
+from omzet_analyse import Ontdubbelaar
+from opmaak import kolomopmaak
+from tabelweergave import toon_gepagineerd
+from tijden import wachttijd
+from trendgrafieken import maak_trends, toon_trends
+
+# Kolommen die het dashboard nodig heeft (zie inlezen.py). Alle kolommen
+# worden ingelezen, zodat de brongegevens onderaan volledig blijven.
+SCHEMA = {
+    "verplicht": ['Tripnr', 'Date', 'Client', 'Arrival', 'Departure', 'LM'],
+    "dtype": {'Client': str},
+    "categorisch": ['Client'],
+    "alle_kolommen": True,
+}
+
 # Pagina instellingen
 st.set_page_config(page_title="DASHBOARD CS Genk", layout="wide")
 
 st.title("📊 DASHBOARD CS Genk")
 st.markdown("Analyse van wachttijden en laadmeters op basis van unieke ritten.")
 
-# 1. Bestand uploaden
-uploaded_file = st.file_uploader("Kies een Excel bestand", type=['xlsx'])
+# 1. Bestand(en) uploaden; met exports van meerdere maanden worden ook trends getoond
+uploaded_files = st.file_uploader("Kies een of meerdere Excel bestanden", type=['xlsx'], accept_multiple_files=True)
+
+if uploaded_files:
+    # Inlezen data (bestanden die nog niet in de cache zitten, parallel)
+    dfs = []
+    for uploaded_file, (df_single, fout) in zip(uploaded_files, lees_excel_bestanden(uploaded_files, SCHEMA)):
+        if fout is not None:
+            st.warning(f"Kon bestand '{uploaded_file.name}' niet lezen: {fout}. Dit bestand wordt overgeslagen.")
+            continue
+        ontbrekend = ontbrekende_kolommen(df_single, SCHEMA)
+        if ontbrekend:
+            st.error(f"Het Excel-bestand '{uploaded_file.name}' mist de volgende kolommen: {', '.join(ontbrekend)}")
+            st.stop()
+        dfs.append(df_single)
 
-if uploaded_file:
-    # Inlezen data
-    df = pd.read_excel(uploaded_file)
+    if not dfs:
+        st.error("Geen geldig Excel-bestand gevonden om te verwerken.")
+        st.stop()
+
+    df = dfs[0]
+    if len(dfs) > 1:
+        # Overlappende exports: regels die al in een eerder bestand stonden,
+        # één keer tellen. Gelijke regels binnen één bestand blijven staan.
+        ontdubbelaar = Ontdubbelaar(sleutel_kolommen=list(dfs[0].columns))
+        delen = []
+        for df_single in dfs:
+            delen.append(ontdubbelaar.filter(df_single))
+            ontdubbelaar.volgend_bestand()
+        df = pd.concat(delen, ignore_index=True)
+        df['Client'] = df['Client'].astype("category")
     
+    # Kolommen uit het bestand zelf (zonder de hulpkolommen hieronder), voor de brongegevens
+    bron_kolommen = list(df.columns)
+
     # Data Cleaning & Voorbereiding
     df['Date'] = pd.to_datetime(df['Date'])
-    df['Maand'] = df['Date'].dt.month_name()
+    # Maand met jaar (zelfde indeling als de trend per maand), zodat januari
+    # 2024 en januari 2025 apart blijven; sorteert in kalendervolgorde
+    df['Maand'] = df['Date'].dt.to_period('M')
     
-    # Wachttijd berekenen (Departure - Arrival)
-    df['Arrival_td'] = pd.to_timedelta(df['Arrival'].astype(str))
-    df['Departure_td'] = pd.to_timedelta(df['Departure'].astype(str))
-    df['Wait_Hours'] = (df['Departure_td'] - df['Arrival_td']).dt.total_seconds() / 3600
-
-    # DATASET VOOR WACHTUREN (Ontdubbelen op Tripnr)
-    df_unique_trips = df.groupby('Tripnr').agg({
-        'Wait_Hours': 'max',
-        'Maand': 'first',
-        'Client': 'first',
-        'Date': 'first'
-    }).reset_index()
-
-    # DATASET VOOR LM PER RIT (Som van LM per unieke rit voor gemiddelde berekening)
-    df_lm_per_trip = df.groupby(['Tripnr', 'Client', 'Maand'])['LM'].sum().reset_index()
+    # Wachttijd berekenen (Departure - Arrival, vertrek na middernacht = +24 u)
+    df = df.join(wachttijd(df['Arrival'], df['Departure']))
+    aantal_ongeldig = int(df['Tijd_Ongeldig'].sum())
+    if aantal_ongeldig:
+        st.warning(
+            f"{aantal_ongeldig} regels hebben een lege of ongeldige Arrival/Departure; "
+            "die tellen niet mee in de wachturen."
+        )
+        with st.expander("Bekijk de regels met een ongeldige tijd"):
+            toon_gepagineerd(df.loc[df['Tijd_Ongeldig'], bron_kolommen], "ongeldige_tijden")
+
+    # RITTENTABEL: één rij per Tripnr, in één groupby. Alle secties hieronder
+    # rekenen hierop verder. Klant, maand en datum van een rit komen van de
+    # eerste regel van die rit.
+    ritten = df.groupby('Tripnr').agg(
+        Wait_Hours=('Wait_Hours', 'max'),
+        LM=('LM', 'sum'),
+        Regels=('LM', 'size'),
+        Client=('Client', 'first'),
+        Maand=('Maand', 'first'),
+        Date=('Date', 'first'),
+    ).reset_index()
+    ritten['Dag'] = ritten['Date'].dt.date
 
     # --- SECTIE 1: WACHTUREN (BOVENAAN) ---
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader("⏳ Gem. Wachturen per Maand")
-        monthly_wait = df_unique_trips.groupby('Maand')['Wait_Hours'].mean().reset_index()
+        monthly_wait = ritten.groupby('Maand')['Wait_Hours'].mean().reset_index()
         monthly_wait.columns = ['Maand', 'Gem. Wachturen (u)']
+        monthly_wait['Maand'] = monthly_wait['Maand'].dt.strftime('%Y-%m')
         st.table(monthly_wait.round(2))
 
     with col2:
         st.subheader("👥 Gem. Wachturen per Klant")
-        client_wait = df_unique_trips.groupby('Client')['Wait_Hours'].mean().sort_values(ascending=False).reset_index()
+        client_wait = ritten.groupby('Client', observed=True)['Wait_Hours'].mean().sort_values(ascending=False).reset_index()
         client_wait.columns = ['Klant', 'Gem. Wachturen (u)']
         st.table(client_wait.round(2))
 
@@ -54,30 +109,44 @@ if uploaded_file:
     # --- SECTIE 2: LAADMETERS PER KLANT PER MAAND ---
     st.subheader("🚛 Laadmeters per Klant per Maand")
     
-    # Totaal LM (som van alle regels)
-    total_lm = df.groupby(['Maand', 'Client'])['LM'].sum().reset_index(name='Totaal LM')
-    
-    # Gemiddelde LM (gebaseerd op som per unieke rit)
-    avg_lm = df_lm_per_trip.groupby(['Maand', 'Client'])['LM'].mean().reset_index(name='Gem. LM per Rit')
-    
-    # Samenvoegen voor overzicht
-    client_lm_combined = pd.merge(total_lm, avg_lm, on=['Maand', 'Client'])
-    st.dataframe(client_lm_combined.round(2), use_container_width=True)
+    # Totaal LM en gemiddelde LM per rit (som van LM per unieke rit)
+    client_lm_combined = ritten.groupby(['Maand', 'Client'], observed=True)['LM'].agg(
+        **{'Totaal LM': 'sum', 'Gem. LM per Rit': 'mean'}
+    ).reset_index()
+    client_lm_combined['Maand'] = client_lm_combined['Maand'].dt.strftime('%Y-%m')
+    st.dataframe(
+        client_lm_combined,
+        use_container_width=True,
+        column_config=kolomopmaak({'Totaal LM': "decimaal", 'Gem. LM per Rit': "decimaal"}),
+    )
 
     st.divider()
 
     # --- SECTIE 3: DAGELIJKS OVERZICHT (ONDERAAN) ---
     st.subheader("📅 Ritten en Laadmeters per Dag")
-    # Aantal ritten uit unieke lijst, Totaal LM uit alle regels
-    daily_trips = df_unique_trips.groupby(df_unique_trips['Date'].dt.date).size().reset_index(name='Aantal Ritten')
-    daily_lm = df.groupby(df['Date'].dt.date)['LM'].sum().reset_index(name='Totaal LM')
-    daily_stats = pd.merge(daily_trips, daily_lm, on='Date')
+    daily_stats = ritten.groupby('Dag').agg(
+        **{'Aantal Ritten': ('Tripnr', 'size'), 'Aantal Regels': ('Regels', 'sum'), 'Totaal LM': ('LM', 'sum')}
+    ).reset_index().rename(columns={'Dag': 'Date'})
     
     st.dataframe(daily_stats, use_container_width=True)
 
-    # Optioneel: Ruwe data
+    st.divider()
+
+    # --- SECTIE 4: TRENDS ---
+    st.subheader("📈 Trends per Klant")
+    # Per dag, week en maand één keer geaggregeerd per set uploads
+    sleutel = tuple(f.file_id for f in uploaded_files)
+    bewaard = st.session_state.get("csgenk_trends")
+    if bewaard is not None and bewaard[0] == sleutel:
+        trends = bewaard[1]
+    else:
+        trends = maak_trends(ritten)
+        st.session_state["csgenk_trends"] = (sleutel, trends)
+    toon_trends(trends)
+
+    # Optioneel: Ruwe data (per pagina, zodat niet het hele bestand naar de browser gaat)
     with st.expander("Bekijk de volledige brongegevens"):
-        st.write(df)
+        toon_gepagineerd(df[bron_kolommen], "bron")
 
 else:
-    st.info("Upload een Excel-bestand om het dashboard te laden.")
+    st.info("Upload een of meerdere Excel-bestanden om het dashboard te laden.")
@@ -1,12 +1,35 @@
-import re
-from io import BytesIO
-from urllib.parse import quote
+import math
+import os
 
-import requests
 import streamlit as st
 import pandas as pd
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+
+from inlezen import lees_excel, ontbrekende_kolommen
+from opdrachtgever_mail import (
+    bouw_eml,
+    bouw_html_tabel,
+    bouw_mail_html,
+    bouw_mails,
+    bouw_mail_onderwerp,
+    bouw_nav_links,
+    bouw_overzicht,
+    eml_bestandsnaam,
+    exporteer_mails_zip,
+    normaliseer_emails,
+    onbekende_opdrachtgevers,
+    sorteer_op_type,
+    verdeel_per_opdrachtgever,
+)
+from opdrachtgever_opslag import (
+    bewaar_overrides,
+    lees_overrides,
+    lees_versie,
+    maak_overrides,
+    normaliseer_opdrachtgever_kolom,
+    wis_overrides,
+)
+from sharepoint import haal_sharepoint_excel_op
+from smtp_verzending import maak_bericht, verzend_mails
 
 st.set_page_config(page_title="Verzendingsoverzicht per Opdrachtgever", layout="wide")
 
@@ -38,31 +61,25 @@ BASIS_KOLOMMEN = [
     "ETA",
 ]
 
+# Kolommen die enkel gebruikt worden als ze in het bestand aanwezig zijn.
+OPTIONELE_KOLOMMEN = ["Klantnaam", "Afzender", "LaadLosRef", "NAV"]
+
+# Enkel deze kolommen worden uit het bestand ingelezen (zie inlezen.py).
+SCHEMA = {
+    "verplicht": BASIS_KOLOMMEN + ["Opdrachtgever"],
+    "optioneel": OPTIONELE_KOLOMMEN,
+    "categorisch": ["Opdrachtgever", "Type", "Plaatsnaam"],
+}
+
+# Aantal opdrachtgevers dat per pagina volledig opgebouwd wordt.
+OPDRACHTGEVERS_PER_PAGINA = 10
+
 SHAREPOINT_MAIL_LINK = (
     "https://transuniversegroup.sharepoint.com/:x:/s/test/"
     "IQAx-1WjSi8STprH4EdAnxkqAZIcMStzyLAi3jSMtQyQeac?e=aJYYVf"
 )
 
 
-def haal_sharepoint_excel_op(url: str) -> BytesIO:
-    """Probeert een Excel-bestand rechtstreeks van een SharePoint-deel-link
-    te downloaden. Werkt enkel als de link 'iedereen met de link'-toegang
-    heeft; bij een link die login vereist, komt er een HTML-loginpagina
-    terug in plaats van het bestand, en gooien we een duidelijke fout."""
-    download_url = url + ("&download=1" if "?" in url else "?download=1")
-    resp = requests.get(download_url, timeout=15)
-    resp.raise_for_status()
-
-    content_type = resp.headers.get("Content-Type", "").lower()
-    if "html" in content_type:
-        raise ValueError(
-            "SharePoint gaf een inlogpagina terug in plaats van het bestand. "
-            "Automatisch ophalen werkt enkel als de link is ingesteld op "
-            "'Iedereen met de link'. Gebruik anders de handmatige upload hieronder."
-        )
-    return BytesIO(resp.content)
-
-
 def raad_kolom(kolommen, kandidaten):
     """Zoekt de eerste kolomnaam die (case-insensitief) overeenkomt met een
     van de kandidaat-namen, voor het vooraf invullen van de kolom-mapping."""
@@ -73,36 +90,42 @@ def raad_kolom(kolommen, kandidaten):
     return kolommen[0] if len(kolommen) else None
 
 
-def normaliseer_opdrachtgever(x):
-    """Zet Opdrachtgever om naar een schone string, ook als het een
-    numerieke waarde is (voorkomt bv. '123.0' i.p.v. '123')."""
-    if pd.isna(x):
-        return x
-    if isinstance(x, float) and x.is_integer():
-        return str(int(x))
-    return str(x).strip()
+@st.cache_data(show_spinner=False, max_entries=4)
+def effectieve_opdrachtgevers(versie: int) -> pd.DataFrame:
+    """Hardcoded lijst aangevuld met (en overschreven door) de opgeslagen
+    opdrachtgevers. Wordt enkel opnieuw opgebouwd als de opslag een nieuwe
+    versie heeft."""
+    info = {**OPDRACHTGEVER_INFO, **lees_overrides()}
+    return pd.DataFrame(
+        [
+            {
+                "Code": code,
+                "Klantnaam": gegevens["naam"],
+                "E-mail": gegevens["email"],
+                "Overzicht maken": True,
+            }
+            for code, gegevens in info.items()
+        ]
+    )
 
 
 st.title("📦 Verzendingsoverzicht per Opdrachtgever")
 
-with st.expander("🔄 Mailadressen vernieuwen (enkel voor deze sessie)"):
+with st.expander("🔄 Mailadressen vernieuwen"):
     st.caption(
-        "Haalt Code / Klantnaam / E-mail op uit een Excel-bestand en past dit "
-        "tijdelijk toe, bovenop de hardcoded lijst in de code (die blijft ongewijzigd). "
-        "Na een herstart van de app moet dit opnieuw ingeladen worden."
+        "Haalt Code / Klantnaam / E-mail op uit een Excel-bestand en bewaart dit "
+        "op de server, bovenop de hardcoded lijst in de code (die blijft ongewijzigd). "
+        "De opgeslagen lijst geldt voor iedereen en blijft bewaard na een herstart van de app."
     )
 
-    if "opdrachtgever_overrides" not in st.session_state:
-        st.session_state["opdrachtgever_overrides"] = {}
-
     df_mail = None
     kol1, kol2 = st.columns(2)
     with kol1:
         if st.button("📡 Automatisch ophalen vanaf SharePoint"):
             try:
-                bestand = haal_sharepoint_excel_op(SHAREPOINT_MAIL_LINK)
-                df_mail = pd.read_excel(bestand)
-                st.success(f"{len(df_mail)} rijen opgehaald van SharePoint.")
+                inhoud, _ = haal_sharepoint_excel_op(SHAREPOINT_MAIL_LINK)
+                st.session_state["maillijst_sharepoint"] = inhoud
+                st.success(f"{len(lees_excel(inhoud))} rijen opgehaald van SharePoint.")
             except Exception as e:
                 st.error(f"Automatisch ophalen is mislukt: {e}")
     with kol2:
@@ -111,11 +134,16 @@ with st.expander("🔄 Mailadressen vernieuwen (enkel voor deze sessie)"):
         )
         if mail_upload is not None:
             try:
-                df_mail = pd.read_excel(mail_upload)
+                df_mail = lees_excel(mail_upload)
                 st.success(f"{len(df_mail)} rijen ingelezen uit geüpload bestand.")
             except Exception as e:
                 st.error(f"Kon het bestand niet inlezen: {e}")
 
+    # De van SharePoint opgehaalde lijst blijft beschikbaar bij volgende reruns
+    # (bv. na 'Toepassen'), zonder opnieuw te downloaden of te parsen.
+    if df_mail is None and "maillijst_sharepoint" in st.session_state:
+        df_mail = lees_excel(st.session_state["maillijst_sharepoint"])
+
     if df_mail is not None:
         st.dataframe(df_mail.head(20), use_container_width=True, hide_index=True)
 
@@ -137,24 +165,16 @@ with st.expander("🔄 Mailadressen vernieuwen (enkel voor deze sessie)"):
                 index=kolommen.index(raad_kolom(kolommen, ["Email", "E-mail", "Mailadres", "Mail"])),
             )
 
-        if st.button("✅ Toepassen op deze sessie"):
-            nieuwe_overrides = {}
-            for _, rij in df_mail.iterrows():
-                code = normaliseer_opdrachtgever(rij[kol_code])
-                if not code or pd.isna(rij[kol_code]):
-                    continue
-                nieuwe_overrides[code] = {
-                    "naam": str(rij[kol_naam]).strip(),
-                    "email": str(rij[kol_email]).strip(),
-                }
-            st.session_state["opdrachtgever_overrides"] = nieuwe_overrides
-            st.success(f"{len(nieuwe_overrides)} opdrachtgevers toegepast voor deze sessie.")
+        if st.button("✅ Toepassen en bewaren"):
+            aantal = bewaar_overrides(maak_overrides(df_mail, kol_code, kol_naam, kol_email))
+            st.success(f"{aantal} opdrachtgevers bewaard.")
             st.rerun()
 
-EFFECTIEVE_OPDRACHTGEVER_INFO = {
-    **OPDRACHTGEVER_INFO,
-    **st.session_state.get("opdrachtgever_overrides", {}),
-}
+    if st.button("🗑️ Opgeslagen mailadressen wissen"):
+        wis_overrides()
+        st.rerun()
+
+df_opdrachtgevers = effectieve_opdrachtgevers(lees_versie())
 
 # ---------------------------------------------------------------------------
 # Tabel met opdrachtgevers: hier kan je per opdrachtgever aan-
@@ -162,18 +182,6 @@ EFFECTIEVE_OPDRACHTGEVER_INFO = {
 # ---------------------------------------------------------------------------
 st.subheader("Opdrachtgevers")
 
-df_opdrachtgevers = pd.DataFrame(
-    [
-        {
-            "Code": code,
-            "Klantnaam": info["naam"],
-            "E-mail": info["email"],
-            "Overzicht maken": True,
-        }
-        for code, info in EFFECTIEVE_OPDRACHTGEVER_INFO.items()
-    ]
-)
-
 opdrachtgevers_selectie = st.data_editor(
     df_opdrachtgevers,
     column_config={
@@ -190,140 +198,71 @@ opdrachtgevers_selectie = st.data_editor(
 uploaded_file = st.file_uploader("Upload het Excel-bestand", type=["xlsx", "xls"])
 
 
-def normaliseer_emails(email_veld: str) -> str:
-    """Zet een e-mailveld met meerdere adressen (gescheiden door ';' of ',')
-    om naar een correct geformatteerde, komma-gescheiden lijst voor de
-    'To'-header van de mail."""
-    if not email_veld:
-        return ""
-    onderdelen = re.split(r"[;,]", str(email_veld))
-    onderdelen = [e.strip() for e in onderdelen if e.strip()]
-    return ", ".join(onderdelen)
-
-
-NAV_LINK_PREFIX = (
-    "navision://client/run?servername=server05%26database=NAVITRANS%26company=TUF"
-    "%26target=Form%202028368%26view=SORTING(Field300,Field3)%26servertype=MSSQL%26position="
-)
-
-
-def bouw_nav_link(nav_waarde) -> str | None:
-    """Bouwt de Navision-link op basis van de waarde in de 'NAV'-kolom."""
-    if pd.isna(nav_waarde) or str(nav_waarde).strip() == "":
-        return None
-    return NAV_LINK_PREFIX + quote(str(nav_waarde).strip(), safe="")
-
-
-def bereken_afzender(row) -> str:
-    """Bepaalt de weergave van de 'Afzender'-kolom op basis van 'Type':
-    - Type = 'Laden'    -> '-> Afzender'
-    - Type = 'levering' -> '<- Afzender'
-    - andere waarden    -> leeg
-    (niet hoofdlettergevoelig, spaties worden genegeerd)
-    """
-    type_waarde = str(row.get("Type", "")).strip().lower()
-    afzender = row.get("Afzender", "")
-    afzender = "" if pd.isna(afzender) else str(afzender).strip()
-
-    if type_waarde == "laden":
-        return f"-> {afzender}"
-    elif type_waarde == "levering":
-        return f"<- {afzender}"
+@st.fragment
+def toon_opdrachtgever(code: str, naam: str, email: str, subset: pd.DataFrame) -> None:
+    """Toont het overzicht van één opdrachtgever. Als fragment wordt enkel
+    deze sectie opnieuw uitgevoerd wanneer er binnen de sectie iets wijzigt,
+    en de mail (HTML + .eml) wordt pas opgebouwd als de gebruiker erom vraagt."""
+    st.markdown("---")
+    st.subheader(f"📋 {naam}  (code {code})  ·  {email}")
+
+    overzicht = bouw_overzicht(subset)
+
+    # ---- Schermweergave: incl. Navision-hyperlink (enkel op scherm, niet in de mail) ----
+    if "NAV" in subset.columns:
+        overzicht_scherm = overzicht.copy()
+        overzicht_scherm["Navision"] = bouw_nav_links(subset["NAV"])
+        st.dataframe(
+            overzicht_scherm,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Navision": st.column_config.LinkColumn(
+                    "Navision", display_text="🔗 Openen"
+                )
+            },
+        )
     else:
-        return ""
-
-
-def bouw_overzicht(subset: pd.DataFrame) -> pd.DataFrame:
-    """Bouwt het overzicht op met de basiskolommen, aangevuld met de
-    optionele kolommen 'Klantnaam' (-> 'Naam'), 'LaadLosRef' en
-    'Afzender' (berekend), telkens enkel als ze in het bestand aanwezig zijn.
-    Verwacht dat 'subset' al gesorteerd is (zie sorteer_op_type)."""
-    overzicht = pd.DataFrame(index=subset.index)
-
-    overzicht["Verzending-ID"] = subset["Verzending-ID"]
-    overzicht["Type"] = subset["Type"]
-    overzicht["PC"] = subset["PC"]
-    overzicht["Plaatsnaam"] = subset["Plaatsnaam"]
+        st.dataframe(overzicht, use_container_width=True, hide_index=True)
 
-    if "Klantnaam" in subset.columns:
-        overzicht["Naam"] = subset["Klantnaam"]
+    if not st.toggle("✉️ Mail voorbereiden", key=f"mail_{code}"):
+        return
 
-    overzicht["Kg"] = subset["Kg"]
-    overzicht["LM"] = subset["LM"]
-    overzicht["Aantal"] = subset["Aantal"]
-    overzicht["Goederen"] = subset["Goederen"]
-    overzicht["ETA"] = subset["ETA"]
+    # ---- HTML-mail opbouwen ----
+    tabel_html = bouw_html_tabel(overzicht)
+    mail_html = bouw_mail_html(naam, tabel_html)
 
-    if "LaadLosRef" in subset.columns:
-        overzicht["LaadLosRef"] = subset["LaadLosRef"]
+    mail_subject = bouw_mail_onderwerp(naam)
 
-    if "Afzender" in subset.columns:
-        overzicht["Afzender"] = subset.apply(bereken_afzender, axis=1)
+    with st.container(border=True):
+        st.markdown("**Voorbeeld van de mail:**")
+        st.markdown(mail_html, unsafe_allow_html=True)
 
-    return overzicht.reset_index(drop=True)
+        eml_bytes = bouw_eml(email, mail_subject, mail_html)
 
-
-def sorteer_op_type(subset: pd.DataFrame) -> pd.DataFrame:
-    """Sorteert de rijen op 'Type', met behoud van de onderlinge volgorde."""
-    return subset.sort_values(by="Type", kind="stable").reset_index(drop=True)
-
-
-def bouw_html_tabel(overzicht: pd.DataFrame) -> str:
-    """Bouwt een mooi opgemaakte, uitgelijnde HTML-tabel voor in de mail."""
-    kolom_stijl = (
-        "border:1px solid #cccccc; padding:6px 10px; "
-        "font-family:Calibri,Arial,sans-serif; font-size:11pt;"
-    )
-    header_stijl = kolom_stijl + " background-color:#1F4E78; color:#ffffff; text-align:left;"
-
-    html = ['<table style="border-collapse:collapse; width:100%;">', "<tr>"]
-    for kol in overzicht.columns:
-        html.append(f'<th style="{header_stijl}">{kol}</th>')
-    html.append("</tr>")
-
-    for i, (_, row) in enumerate(overzicht.iterrows()):
-        rij_kleur = "#ffffff" if i % 2 == 0 else "#F2F2F2"
-        html.append("<tr>")
-        for kol in overzicht.columns:
-            waarde = row[kol]
-            waarde = "" if pd.isna(waarde) else waarde
-            html.append(f'<td style="{kolom_stijl} background-color:{rij_kleur};">{waarde}</td>')
-        html.append("</tr>")
-
-    html.append("</table>")
-    return "".join(html)
-
-
-def bouw_eml(to_email: str, subject: str, html_body: str) -> bytes:
-    """Bouwt een .eml-bestand dat Outlook als bewerkbare, klaarstaande
-    mail opent (X-Unsent: 1 zorgt dat het als concept opent i.p.v.
-    als gelezen bericht). 'to_email' mag meerdere, komma-gescheiden
-    adressen bevatten."""
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["To"] = to_email
-    msg["X-Unsent"] = "1"
-
-    plain_fallback = (
-        "Deze mail bevat een overzicht in tabelvorm. "
-        "Open dit bestand in Outlook om de opgemaakte versie te zien."
-    )
-    msg.attach(MIMEText(plain_fallback, "plain"))
-    msg.attach(MIMEText(html_body, "html"))
-
-    return msg.as_bytes()
+        st.download_button(
+            label="📥 Download als Outlook-mail (.eml)",
+            data=eml_bytes,
+            file_name=eml_bestandsnaam(naam, code),
+            mime="message/rfc822",
+            key=f"eml_{code}",
+        )
+        st.caption(
+            "Open het gedownloade .eml-bestand met een dubbelklik: het opent "
+            "automatisch als een nieuw, bewerkbaar concept-bericht in Outlook, "
+            "met de tabel al opgemaakt en klaar om te verzenden."
+        )
 
 
 if uploaded_file is not None:
     try:
-        df = pd.read_excel(uploaded_file)
+        df = lees_excel(uploaded_file, SCHEMA)
     except Exception as e:
         st.error(f"Kon het bestand niet inlezen: {e}")
         st.stop()
 
     # Check of alle verplichte basiskolommen aanwezig zijn
-    verplichte_kolommen = set(BASIS_KOLOMMEN + ["Opdrachtgever"])
-    ontbrekend = verplichte_kolommen - set(df.columns)
+    ontbrekend = ontbrekende_kolommen(df, SCHEMA)
     if ontbrekend:
         st.error(f"Volgende kolommen ontbreken in het bestand: {', '.join(sorted(ontbrekend))}")
         st.stop()
@@ -332,81 +271,179 @@ if uploaded_file is not None:
 
     # Info over welke optionele kolommen gevonden werden
     optionele_kolommen_gevonden = [
-        k for k in ["Klantnaam", "Afzender", "LaadLosRef", "NAV"] if k in df.columns
+        k for k in OPTIONELE_KOLOMMEN if k in df.columns
     ]
     if optionele_kolommen_gevonden:
         st.caption(f"Extra kolommen gevonden en verwerkt: {', '.join(optionele_kolommen_gevonden)}")
 
-    df["Opdrachtgever"] = df["Opdrachtgever"].apply(normaliseer_opdrachtgever)
+    df["Opdrachtgever"] = normaliseer_opdrachtgever_kolom(df["Opdrachtgever"])
+
+    # Eén partitie-stap voor alle opdrachtgevers samen (i.p.v. een filter per code)
+    partities = verdeel_per_opdrachtgever(df)
+
+    onbekend = onbekende_opdrachtgevers(partities, df_opdrachtgevers["Code"])
+    if not onbekend.empty:
+        st.warning(
+            f"{len(onbekend)} opdrachtgever-code(s) in het bestand staan niet in de "
+            f"opdrachtgeverslijst ({int(onbekend['Zendingen'].sum())} zendingen)."
+        )
+        with st.expander("Bekijk de onbekende opdrachtgever-codes"):
+            st.dataframe(onbekend, use_container_width=True, hide_index=True)
 
+    # Eerst de geselecteerde opdrachtgevers met zendingen verzamelen (enkel de
+    # rijposities); de subsets zelf worden pas opgebouwd als ze nodig zijn.
+    selectie = []
     for _, opdrachtgever_rij in opdrachtgevers_selectie.iterrows():
         if not opdrachtgever_rij["Overzicht maken"]:
             continue
 
         code = opdrachtgever_rij["Code"]
-        naam = opdrachtgever_rij["Klantnaam"]
-        email = normaliseer_emails(opdrachtgever_rij["E-mail"])
-
-        subset = df[df["Opdrachtgever"] == code]
-        if subset.empty:
+        posities = partities.get(code)
+        if posities is None or len(posities) == 0:
             continue
 
-        subset = sorteer_op_type(subset)
+        selectie.append(
+            (
+                code,
+                opdrachtgever_rij["Klantnaam"],
+                normaliseer_emails(opdrachtgever_rij["E-mail"]),
+                posities,
+            )
+        )
 
+    # ---- Bulk-export: alle mails in één ZIP, enkel op aanvraag ----
+    if selectie:
         st.markdown("---")
-        st.subheader(f"📋 {naam}  (code {code})  ·  {email}")
-
-        overzicht = bouw_overzicht(subset)
-
-        # ---- Schermweergave: incl. Navision-hyperlink (enkel op scherm, niet in de mail) ----
-        if "NAV" in subset.columns:
-            overzicht_scherm = overzicht.copy()
-            overzicht_scherm["Navision"] = subset["NAV"].apply(bouw_nav_link)
-            st.dataframe(
-                overzicht_scherm,
-                use_container_width=True,
-                hide_index=True,
-                column_config={
-                    "Navision": st.column_config.LinkColumn(
-                        "Navision", display_text="🔗 Openen"
-                    )
-                },
-            )
-        else:
-            st.dataframe(overzicht, use_container_width=True, hide_index=True)
-
-        # ---- HTML-mail opbouwen ----
-        tabel_html = bouw_html_tabel(overzicht)
-        mail_html = f"""
-        <html>
-        <body style="font-family:Calibri,Arial,sans-serif; font-size:11pt;">
-            <p>Beste,</p>
-            <p>Hieronder vindt u het overzicht van de uit te voeren zendingen voor <b>{naam}</b>:</p>
-            {tabel_html}
-            <p>Met vriendelijke groeten,</p>
-        </body>
-        </html>
-        """
-
-        mail_subject = f"Overzicht uit te voeren zendingen - {naam}"
-
-        with st.expander("✉️ Mail voorbereiden"):
-            st.markdown("**Voorbeeld van de mail:**")
-            st.markdown(mail_html, unsafe_allow_html=True)
-
-            eml_bytes = bouw_eml(email, mail_subject, mail_html)
+        st.subheader("📦 Alle mails exporteren")
+        zip_sleutel = (uploaded_file.file_id, tuple(item[0] for item in selectie))
+
+        if st.button(f"📦 Bouw ZIP met {len(selectie)} mails"):
+            voortgang = st.progress(0.0, text="Mails opbouwen...")
+
+            def meld_voortgang(klaar, totaal):
+                voortgang.progress(klaar / totaal, text=f"{klaar} van {totaal} mails opgebouwd")
 
+            taken = [
+                (code, naam, email, sorteer_op_type(df.iloc[posities]))
+                for code, naam, email, posities in selectie
+            ]
+            try:
+                st.session_state["mails_zip"] = {
+                    "sleutel": zip_sleutel,
+                    "data": exporteer_mails_zip(taken, meld_voortgang),
+                }
+            except Exception as e:
+                st.error(f"Kon de ZIP met mails niet opbouwen: {e}")
+
+        mails_zip = st.session_state.get("mails_zip")
+        if mails_zip is not None and mails_zip["sleutel"] == zip_sleutel:
             st.download_button(
-                label="📥 Download als Outlook-mail (.eml)",
-                data=eml_bytes,
-                file_name=f"Overzicht_{naam}_{code}.eml",
-                mime="message/rfc822",
-                key=f"eml_{code}",
+                label=f"📥 Download alle mails (.zip, {len(selectie)} mails)",
+                data=mails_zip["data"],
+                file_name="Overzichten_opdrachtgevers.zip",
+                mime="application/zip",
+                key="eml_zip",
             )
+
+        # ---- Optioneel: rechtstreeks verzenden via SMTP i.p.v. .eml-concepten ----
+        with st.expander("📤 Mails rechtstreeks verzenden (SMTP)"):
             st.caption(
-                "Open het gedownloade .eml-bestand met een dubbelklik: het opent "
-                "automatisch als een nieuw, bewerkbaar concept-bericht in Outlook, "
-                "met de tabel al opgemaakt en klaar om te verzenden."
+                "Verstuurt alle geselecteerde mails in één keer via de mailserver. "
+                "Standaardwaarden komen uit de omgevingsvariabelen SMTP_HOST, SMTP_PORT, "
+                "SMTP_GEBRUIKER en SMTP_AFZENDER."
             )
+            s1, s2, s3 = st.columns(3)
+            with s1:
+                smtp_host = st.text_input("SMTP-server", os.environ.get("SMTP_HOST", ""))
+                smtp_port = st.number_input(
+                    "Poort", min_value=1, max_value=65535, value=int(os.environ.get("SMTP_PORT", 587))
+                )
+            with s2:
+                smtp_gebruiker = st.text_input("Gebruiker", os.environ.get("SMTP_GEBRUIKER", ""))
+                smtp_wachtwoord = st.text_input("Wachtwoord", type="password")
+            with s3:
+                smtp_afzender = st.text_input(
+                    "Afzender (From)", os.environ.get("SMTP_AFZENDER", smtp_gebruiker)
+                )
+                smtp_starttls = st.checkbox("STARTTLS gebruiken", value=True)
+                smtp_max_per_seconde = st.number_input(
+                    "Max. mails per seconde (0 = onbeperkt)", min_value=0.0, value=2.0, step=0.5
+                )
+
+            bevestigd = st.checkbox(f"Ik wil {len(selectie)} mails nu echt verzenden")
+            if st.button(
+                f"📤 Verzend {len(selectie)} mails",
+                disabled=not (bevestigd and smtp_host and smtp_afzender),
+            ):
+                voortgang = st.progress(0.0, text="Mails opbouwen...")
+                taken = [
+                    (code, naam, email, sorteer_op_type(df.iloc[posities]))
+                    for code, naam, email, posities in selectie
+                ]
+                berichten = []
+                statussen = []
+                for i, _, eml_bytes in bouw_mails(taken):
+                    code, naam, email, _ = taken[i]
+                    if not email:
+                        statussen.append(
+                            {"Sleutel": code, "Status": "Overgeslagen", "Pogingen": 0, "Fout": "Geen e-mailadres"}
+                        )
+                        continue
+                    berichten.append((code, maak_bericht(eml_bytes, smtp_afzender)))
+
+                def meld_verzonden(klaar, totaal):
+                    voortgang.progress(klaar / totaal, text=f"{klaar} van {totaal} mails verwerkt")
+
+                try:
+                    statussen += verzend_mails(
+                        berichten,
+                        host=smtp_host,
+                        port=int(smtp_port),
+                        gebruiker=smtp_gebruiker or None,
+                        wachtwoord=smtp_wachtwoord,
+                        starttls=smtp_starttls,
+                        max_per_seconde=smtp_max_per_seconde or None,
+                        voortgang=meld_verzonden,
+                    )
+                except Exception as e:
+                    st.error(f"Verzenden is mislukt: {e}")
+
+                namen = {item[0]: (item[1], item[2]) for item in selectie}
+                st.session_state["smtp_status"] = pd.DataFrame(
+                    [
+                        {
+                            "Code": status["Sleutel"],
+                            "Klantnaam": namen[status["Sleutel"]][0],
+                            "E-mail": namen[status["Sleutel"]][1],
+                            "Status": status["Status"],
+                            "Pogingen": status["Pogingen"],
+                            "Fout": status["Fout"],
+                        }
+                        for status in statussen
+                    ]
+                )
+
+            if "smtp_status" in st.session_state:
+                smtp_status = st.session_state["smtp_status"]
+                verzonden = int((smtp_status["Status"] == "Verzonden").sum())
+                st.caption(f"{verzonden} van {len(smtp_status)} mails verzonden.")
+                st.dataframe(smtp_status, use_container_width=True, hide_index=True)
+
+    # ---- Weergave per opdrachtgever: enkel de huidige pagina wordt opgebouwd ----
+    aantal_paginas = max(1, math.ceil(len(selectie) / OPDRACHTGEVERS_PER_PAGINA))
+    pagina = 1
+    if aantal_paginas > 1:
+        st.markdown("---")
+        pagina = st.number_input(
+            f"Pagina (van {aantal_paginas}, {OPDRACHTGEVERS_PER_PAGINA} opdrachtgevers per pagina)",
+            min_value=1,
+            max_value=aantal_paginas,
+            value=1,
+            key="opdrachtgevers_pagina",
+        )
+
+    begin = (pagina - 1) * OPDRACHTGEVERS_PER_PAGINA
+    for code, naam, email, posities in selectie[begin:begin + OPDRACHTGEVERS_PER_PAGINA]:
+        toon_opdrachtgever(code, naam, email, sorteer_op_type(df.iloc[posities]))
 else:
     st.info("Upload een Excel-bestand om te starten.")
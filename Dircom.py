@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import io
 
+from afdelingen import compileer, deel_in, lees_regels
+from inlezen import lees_excel
+from opmaak import formatteer, kolomopmaak
+
+# Kolommen die dit rapport uit de export nodig heeft (zie inlezen.py)
+SCHEMA = {
+    "verplicht": ['Verzending-ID', 'LM', 'Type'],
+    "dtype": {'Type': str},
+    "categorisch": ['Type'],
+}
+
 def app():
     st.title("Verzenddata Analyse: Aantallen en Laadmeters")
 
@@ -21,10 +31,10 @@ def app():
     if uploaded_file is not None:
         try:
             # Lees het Excel-bestand in
-            df = pd.read_excel(uploaded_file)
+            df = lees_excel(uploaded_file, SCHEMA)
 
             # --- Controleer op vereiste kolommen ---
-            required_columns_for_this_report = ['Verzending-ID', 'LM', 'Type'] 
+            required_columns_for_this_report = SCHEMA["verplicht"]
             
             missing_columns = [col for col in required_columns_for_this_report if col not in df.columns]
 
@@ -37,25 +47,14 @@ def app():
             df['Verzending-ID'] = pd.to_numeric(df['Verzending-ID'], errors='coerce')
             df['LM'] = pd.to_numeric(df['LM'], errors='coerce').fillna(0) # Vul NaN met 0 voor optelling
             
-            # --- Aanmaken van de nieuwe Afdeling kolom met np.select ---
-            conditions = [
-                (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'Laden'),
-                (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'levering'),
-                (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'Transport'),
-                (df['Verzending-ID'] < 2610000000) & (df['Type'] == 'Laden'),
-                (df['Verzending-ID'] > 2610999999) & (df['Type'] == 'Laden'),
-                (df['Verzending-ID'] < 2610000000) & (df['Type'] != 'Laden'),
-                (df['Verzending-ID'] > 2610999999) & (df['Type'] != 'Laden')
-            ]
-
-            choices = ['ICL AFH', 'ICL LEV', 'ICL DIRECT', 'TUF EXPORT', 'TUF EXPORT', 'TUF IMPORT', 'TUF IMPORT']
-            
-            df['Afdeling'] = np.select(conditions, choices, default='Overig/Onbekend')
+            # --- Aanmaken van de nieuwe Afdeling kolom volgens afdelingen.json ---
+            regels = compileer(lees_regels())
+            df['Afdeling'] = deel_in(df['Verzending-ID'], df['Type'], regels)
 
             st.success("Bestand succesvol ingelezen en verwerkt!")
 
             # --- Dataverwerking: Bundel op 'Verzending-ID' en bereken de som van LM ---
-            df_grouped = df.groupby(['Verzending-ID', 'Afdeling']).agg(
+            df_grouped = df.groupby(['Verzending-ID', 'Afdeling'], observed=True).agg(
                 LM=('LM', 'sum')
             ).reset_index()
 
@@ -67,16 +66,16 @@ def app():
             
             col1, col2 = st.columns(2)
             with col1:
-                st.metric(label="Totaal Zendingen", value=f"{total_zendingen:,.0f}")
+                st.metric(label="Totaal Zendingen", value=formatteer(total_zendingen, "aantal"))
             with col2:
-                st.metric(label="Totale Laadmeter (LM)", value=f"{total_lm:,.2f} LM")
+                st.metric(label="Totale Laadmeter (LM)", value=formatteer(total_lm, "lm"))
 
             st.write("---")
 
             # --- Totaaloverzicht per Afdeling (Zendingen en LM) ---
             st.subheader("2. Detail")
 
-            df_summary_by_category = df_grouped.groupby('Afdeling').agg(
+            df_summary_by_category = df_grouped.groupby('Afdeling', observed=True).agg(
                 Zendingen=('Verzending-ID', 'size'),
                 Totaal_LM=('LM', 'sum')
             ).reset_index()
@@ -84,11 +83,12 @@ def app():
             # Hernoem kolommen voor duidelijkheid
             df_summary_by_category.columns = ['Afdeling', 'Zendingen', 'Totaal LM']
             
-            # Formatteer de numerieke kolommen voor weergave
-            df_summary_by_category['Zendingen'] = df_summary_by_category['Zendingen'].map(lambda x: f"{x:,.0f}")
-            df_summary_by_category['Totaal LM'] = df_summary_by_category['Totaal LM'].map(lambda x: f"{x:,.2f} LM")
-            
-            st.dataframe(df_summary_by_category, hide_index=True)
+            # De numerieke kolommen worden pas bij het tonen opgemaakt
+            st.dataframe(
+                df_summary_by_category,
+                hide_index=True,
+                column_config=kolomopmaak({'Zendingen': "aantal", 'Totaal LM': "lm"}),
+            )
 
         except Exception as e:
             st.error(f"Er is een fout opgetreden bij het verwerken van het bestand: {e}. Controleer of het Excel-bestand de juiste opmaak en kolommen bevat.")
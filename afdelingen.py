@@ -0,0 +1,104 @@
+"""Indeling van zendingen in afdelingen voor Dircom.py.
+
+De regels staan in afdelingen.json (of het bestand in DIRCOM_AFDELINGEN):
+
+    {
+        "standaard": "Overig/Onbekend",        # zonder (numerieke) Verzending-ID
+        "reeksen": [                           # Verzending-ID van t.e.m. tot_en_met
+            {"van": 2610000000, "tot_en_met": 2610999999,
+             "types": {"Laden": "ICL AFH", ...},
+             "anders": "Overig/Onbekend"}      # andere of lege Type
+        ],
+        "buiten_reeksen": {"types": {"Laden": "TUF EXPORT"}, "anders": "TUF IMPORT"}
+    }
+
+Een nieuwe afdeling of ID-reeks toevoegen vraagt dus geen codewijziging.
+
+compileer() zet de regels om in gesorteerde reeksgrenzen en een tabel
+(reeks × Type) -> afdeling. deel_in() zoekt per rij de reeks binair op
+(searchsorted) en de Type via een categorische code, en leest de afdeling
+in één keer uit die tabel, zonder maskers per regel."""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REGELS_PAD = Path(os.environ.get("DIRCOM_AFDELINGEN", Path(__file__).with_name("afdelingen.json")))
+
+
+def lees_regels(pad: Path = REGELS_PAD) -> dict:
+    with open(pad, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compileer(regels: dict) -> dict:
+    """Zet de regels om naar opzoektabellen. Gooit een ValueError als
+    ID-reeksen overlappen."""
+    reeksen = sorted(regels.get("reeksen", []), key=lambda r: r["van"])
+    for vorige, reeks in zip(reeksen, reeksen[1:]):
+        if reeks["van"] <= vorige["tot_en_met"]:
+            raise ValueError(
+                f"Overlappende reeksen in de afdelingsregels: {vorige['van']}-{vorige['tot_en_met']} "
+                f"en {reeks['van']}-{reeks['tot_en_met']}"
+            )
+
+    standaard = regels["standaard"]
+    buiten = regels.get("buiten_reeksen", {})
+    # Per segment: de reeksen in volgorde, dan 'buiten de reeksen', dan 'geen ID'.
+    segmenten = [
+        *[(r.get("types", {}), r.get("anders", standaard)) for r in reeksen],
+        (buiten.get("types", {}), buiten.get("anders", standaard)),
+        ({}, standaard),
+    ]
+
+    types = sorted({t for type_regels, _ in segmenten for t in type_regels})
+    # Alfabetisch, zodat groupby op de categorische kolom dezelfde volgorde
+    # geeft als op tekst.
+    afdelingen = sorted({standaard} | {a for type_regels, anders in segmenten for a in [*type_regels.values(), anders]})
+    code = {afdeling: i for i, afdeling in enumerate(afdelingen)}
+
+    # tabel[segment, typecode]; de laatste kolom is voor andere of lege types
+    tabel = np.empty((len(segmenten), len(types) + 1), dtype=np.int32)
+    for s, (type_regels, anders) in enumerate(segmenten):
+        tabel[s, :] = code[anders]
+        for t, type_naam in enumerate(types):
+            if type_naam in type_regels:
+                tabel[s, t] = code[type_regels[type_naam]]
+
+    return {
+        "van": np.array([r["van"] for r in reeksen], dtype=float),
+        "tot_en_met": np.array([r["tot_en_met"] for r in reeksen], dtype=float),
+        "types": types,
+        "afdelingen": afdelingen,
+        "tabel": tabel,
+    }
+
+
+def deel_in(verzending_id: pd.Series, type_: pd.Series, regels: dict) -> pd.Categorical:
+    """Afdeling per rij, volgens gecompileerde regels (zie compileer).
+    'verzending_id' moet numeriek zijn (NaN = geen ID)."""
+    ids = verzending_id.to_numpy(dtype=float, na_value=np.nan)
+    aantal_reeksen = len(regels["van"])
+
+    # Laatste reeks die vóór of op de ID begint; binnen die reeks als de ID
+    # ook niet voorbij het einde ligt, anders 'buiten de reeksen'.
+    # Index -1 (vóór de eerste reeks) valt op het extra einde NaN (nooit binnen).
+    kandidaat = np.searchsorted(regels["van"], ids, side="right") - 1
+    einde = np.append(regels["tot_en_met"], np.nan).take(kandidaat)
+    segment = np.where(ids <= einde, kandidaat, aantal_reeksen)
+    segment[np.isnan(ids)] = aantal_reeksen + 1
+
+    # Type als categorische codes; enkel de handvol unieke waarden wordt
+    # opgezocht in de gekende types, lege en andere krijgen de laatste
+    # kolom van de tabel.
+    codes, uniek = pd.factorize(type_)
+    anders = len(regels["types"])
+    positie = {type_naam: i for i, type_naam in enumerate(regels["types"])}
+    per_uniek = np.array([positie.get(waarde, anders) for waarde in uniek] + [anders], dtype=np.intp)
+    typecode = per_uniek[codes]  # code -1 (leeg) valt op de extra 'anders' achteraan
+
+    tabel = regels["tabel"]
+    afdeling = tabel.ravel().take(segment * tabel.shape[1] + typecode)
+    return pd.Categorical.from_codes(afdeling, categories=regels["afdelingen"])
@@ -0,0 +1,72 @@
+"""Micro-benchmark: Afdeling per zending in Dircom.py.
+
+Vergelijkt de oude np.select met zeven voorwaarden met deel_in() uit
+afdelingen.py (searchsorted op de reeksen en een tabel reeks × Type) op
+een gegenereerde export. De Verzending-ID's bevatten NaN en de grenzen van
+de reeks, Type komt met lege en onbekende waarden, zowel categorisch (zoals
+na het inlezen) als tekst. Controleert dat beide dezelfde afdeling geven.
+
+    python benchmarks/afdelingen.py"""
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from afdelingen import compileer, deel_in, lees_regels  # noqa: E402
+
+RIJEN = 3_000_000
+GRENZEN = [2609999999, 2610000000, 2610000001, 2610999998, 2610999999, 2611000000]
+
+
+def maak_export() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    ids = rng.integers(2_600_000_000, 2_620_000_000, RIJEN).astype(float)
+    ids[rng.random(RIJEN) < 0.02] = np.nan
+    grens = rng.random(RIJEN) < 0.02
+    ids[grens] = rng.choice(GRENZEN, int(grens.sum()))
+    types = np.array(["Laden", "levering", "Transport", "Lossen", None], dtype=object)
+    return pd.DataFrame({
+        "Verzending-ID": ids,
+        "Type": pd.Series(types[rng.integers(0, len(types), RIJEN)]).astype("category"),
+    })
+
+
+def oud(df: pd.DataFrame) -> np.ndarray:
+    """De np.select uit Dircom.py vóór afdelingen.py."""
+    conditions = [
+        (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'Laden'),
+        (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'levering'),
+        (df['Verzending-ID'] >= 2610000000) & (df['Verzending-ID'] <= 2610999999) & (df['Type'] == 'Transport'),
+        (df['Verzending-ID'] < 2610000000) & (df['Type'] == 'Laden'),
+        (df['Verzending-ID'] > 2610999999) & (df['Type'] == 'Laden'),
+        (df['Verzending-ID'] < 2610000000) & (df['Type'] != 'Laden'),
+        (df['Verzending-ID'] > 2610999999) & (df['Type'] != 'Laden')
+    ]
+    choices = ['ICL AFH', 'ICL LEV', 'ICL DIRECT', 'TUF EXPORT', 'TUF EXPORT', 'TUF IMPORT', 'TUF IMPORT']
+    return np.select(conditions, choices, default='Overig/Onbekend')
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    categorisch = maak_export()
+    tekst = categorisch.assign(Type=categorisch['Type'].astype("str"))
+    regels = compileer(lees_regels())
+
+    print(f"{RIJEN} rijen      np.select (s)  deel_in (s)")
+    for naam, df in [("Type categorie", categorisch), ("Type tekst", tekst)]:
+        nieuw = np.asarray(deel_in(df['Verzending-ID'], df['Type'], regels), dtype=object)
+        assert (oud(df).astype(object) == nieuw).all()
+        assert set(nieuw) == set(regels["afdelingen"])
+        print(f"{naam:<18} {meet(lambda: oud(df)):>13.3f}  "
+              f"{meet(lambda: deel_in(df['Verzending-ID'], df['Type'], regels)):>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Micro-benchmark: Afzender- en Navision-kolom in opdrachtgever_mail.py.
+
+Vergelijkt de functies per rij (bereken_afzender, bouw_nav_link via
+apply) met de kolomversies (bereken_afzender_kolom, bouw_nav_links) op
+een gegenereerde subset, en controleert dat het resultaat gelijk is.
+
+    python benchmarks/afzender_navlinks.py"""
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from opdrachtgever_mail import (  # noqa: E402
+    bereken_afzender,
+    bereken_afzender_kolom,
+    bouw_nav_link,
+    bouw_nav_links,
+)
+
+RIJEN = 200_000
+
+
+def maak_subset() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    afzenders = np.array([" Firma A ", "Firma B & Zn", "Transport C", None], dtype=object)
+    navs = np.array(["NAV001234", " NAV 5/6 ", "", None, "ABC-99"], dtype=object)
+    return pd.DataFrame({
+        "Type": rng.choice(["Laden", " levering", "LADEN ", "Lossen", None], RIJEN),
+        "Afzender": afzenders[rng.integers(0, len(afzenders), RIJEN)],
+        "NAV": navs[rng.integers(0, len(navs), RIJEN)],
+    })
+
+
+def als_lijst(reeks: pd.Series) -> list:
+    # apply maakt van None een NaN (str-dtype); voor de vergelijking zijn beide leeg
+    return [None if pd.isna(waarde) else waarde for waarde in reeks]
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    subset = maak_subset()
+
+    assert als_lijst(subset.apply(bereken_afzender, axis=1)) == als_lijst(bereken_afzender_kolom(subset))
+    assert als_lijst(subset["NAV"].apply(bouw_nav_link)) == als_lijst(bouw_nav_links(subset["NAV"]))
+
+    print(f"{RIJEN} rijen           per rij (s)  kolom (s)")
+    print(f"Afzender          {meet(lambda: subset.apply(bereken_afzender, axis=1)):>11.3f}"
+          f"  {meet(lambda: bereken_afzender_kolom(subset)):>9.3f}")
+    print(f"Navision-links    {meet(lambda: subset['NAV'].apply(bouw_nav_link)):>11.3f}"
+          f"  {meet(lambda: bouw_nav_links(subset['NAV'])):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
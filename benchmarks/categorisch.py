@@ -0,0 +1,52 @@
+"""Micro-benchmark: herhaalde tekstkolommen als categorie (zie inlezen.py).
+
+Vergelijkt op een gegenereerde klantenkolom het geheugengebruik en een
+groupby (aantal en som per klant) met de kolom als tekst en als
+categorie, zoals het schema-sleutel "categorisch" die bij het inlezen
+omzet. Controleert dat beide groupbys hetzelfde resultaat geven.
+
+    python benchmarks/categorisch.py"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+RIJEN = 3_000_000
+KLANTEN = 800
+
+
+def maak_rijen() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    namen = np.array([f"Klant {i:04d} NV" for i in range(KLANTEN)], dtype=object)
+    return pd.DataFrame({
+        "Klantnaam": pd.Series(namen[rng.integers(0, KLANTEN, RIJEN)], dtype="str"),
+        "Prest. Eigen Bedrijf": rng.uniform(0, 1000, RIJEN).round(2),
+    })
+
+
+def per_klant(df: pd.DataFrame) -> pd.DataFrame:
+    return df.groupby("Klantnaam", observed=True)["Prest. Eigen Bedrijf"].agg(["count", "sum"])
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    tekst = maak_rijen()
+    categorie = tekst.assign(Klantnaam=tekst["Klantnaam"].astype("category"))
+
+    oud, nieuw = per_klant(tekst), per_klant(categorie)
+    nieuw.index = nieuw.index.astype("str")
+    pd.testing.assert_frame_equal(oud, nieuw)
+
+    print(f"{RIJEN} rijen, {KLANTEN} klanten   tekst   categorie")
+    print(f"Klantnaam (MB)           {tekst['Klantnaam'].memory_usage(deep=True) / 2**20:>7.1f}"
+          f"   {categorie['Klantnaam'].memory_usage(deep=True) / 2**20:>9.1f}")
+    print(f"groupby count/sum (s)    {meet(lambda: per_klant(tekst)):>7.3f}"
+          f"   {meet(lambda: per_klant(categorie)):>9.3f}")
+    print(f"omzetten naar categorie (s)        {meet(lambda: tekst['Klantnaam'].astype('category')):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
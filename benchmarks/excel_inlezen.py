@@ -0,0 +1,108 @@
+"""Benchmark: parse-tijd en piekgeheugen van inlezen.py op een brede export.
+
+Vergelijkt het oude inlezen (pd.read_excel van alle kolommen met openpyxl
+en afgeleide types) met het schema-inlezen van inlezen._parse (enkel de
+kolommen uit het schema, vaste dtypes), met openpyxl en met calamine (als
+python-calamine geïnstalleerd is). Elke variant draait in een eigen
+proces, zodat het piekgeheugen (ru_maxrss) niet door een vorige variant
+vertekend wordt.
+
+    python benchmarks/excel_inlezen.py [rijen] [kolommen]
+
+Het gegenereerde bestand wordt bewaard in de tijdelijke map en bij een
+volgende run hergebruikt."""
+import importlib.util
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RIJEN = 200_000
+KOLOMMEN = 40
+
+# Zoals Dircom.py: drie kolommen uit een brede export
+SCHEMA = {
+    "verplicht": ["Verzending-ID", "LM", "Type"],
+    "dtype": {"Type": str},
+}
+
+
+def bestand(rijen: int, kolommen: int) -> Path:
+    pad = Path(tempfile.gettempdir()) / f"benchmark_export_{rijen}x{kolommen}.xlsx"
+    if pad.exists():
+        return pad
+
+    import random
+    from datetime import datetime, timedelta
+
+    from openpyxl import Workbook
+
+    rnd = random.Random(0)
+    extra = [f"Kolom {i}" for i in range(kolommen - len(SCHEMA["verplicht"]))]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(SCHEMA["verplicht"] + extra)
+    begin = datetime(2024, 1, 1)
+    for i in range(rijen):
+        vast = [2610000000 + i, round(rnd.random() * 13, 2), rnd.choice(["Laden", "Lossen", "Levering"])]
+        ws.append(vast + [
+            (f"Tekst {rnd.randrange(500)}", rnd.random() * 1000, begin + timedelta(hours=i), i)[j % 4]
+            for j in range(len(extra))
+        ])
+    tijdelijk = pad.with_suffix(".tmp")
+    wb.save(tijdelijk)
+    tijdelijk.replace(pad)
+    return pad
+
+
+def variant(naam: str, pad: Path) -> None:
+    """Eén meting, in dit (verse) proces; print seconden, piek-MB, MB van
+    het resultaat en het aantal kolommen."""
+    from io import BytesIO
+
+    import pandas as pd
+
+    import inlezen
+
+    inhoud = pad.read_bytes()
+    start = time.perf_counter()
+    if naam == "oud":
+        df = pd.read_excel(BytesIO(inhoud), engine="openpyxl")
+    else:
+        inlezen.ENGINE = "calamine" if naam == "schema_calamine" else None
+        df = inlezen._parse(inhoud, SCHEMA)
+    duur = time.perf_counter() - start
+    piek = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB op Linux
+    print(f"{duur:.2f} {piek:.0f} {df.memory_usage(deep=True).sum() / 1e6:.0f} {df.shape[1]}")
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--variant":
+        variant(sys.argv[2], Path(sys.argv[3]))
+        return
+
+    rijen = int(sys.argv[1]) if len(sys.argv) > 1 else RIJEN
+    kolommen = int(sys.argv[2]) if len(sys.argv) > 2 else KOLOMMEN
+    pad = bestand(rijen, kolommen)
+
+    varianten = ["oud", "schema_openpyxl"]
+    if importlib.util.find_spec("python_calamine"):
+        varianten.append("schema_calamine")
+
+    print(f"{rijen} rijen x {kolommen} kolommen ({pad.stat().st_size / 1e6:.0f} MB xlsx)")
+    print(f"{'variant':<16} {'tijd (s)':>9} {'piek (MB)':>10} {'df (MB)':>8} {'kolommen':>9}")
+    for naam in varianten:
+        uitvoer = subprocess.run(
+            [sys.executable, __file__, "--variant", naam, str(pad)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        duur, piek, grootte, aantal = uitvoer[-4:]
+        print(f"{naam:<16} {float(duur):>9.2f} {float(piek):>10.0f} {float(grootte):>8.0f} {aantal:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Micro-benchmark: HTML-tabel in de mail per opdrachtgever.
+
+Vergelijkt de oude opbouw met iterrows met bouw_html_tabel() uit
+opdrachtgever_mail.py (kolom per kolom) op een gegenereerd overzicht. Het
+resultaat moet gelijk zijn, op het ge-escapede &, < en > na: zonder die
+tekens byte voor byte, en met die tekens gelijk aan de oude opbouw op een
+vooraf ge-escaped overzicht.
+
+    python benchmarks/html_tabel.py"""
+import sys
+import timeit
+from html import escape
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from opdrachtgever_mail import bouw_html_tabel  # noqa: E402
+
+AANTALLEN_RIJEN = [1_000, 5_000, 20_000]
+
+
+def maak_overzicht(rijen: int, met_speciale_tekens: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    plaatsen = np.array(["Genk", "Hasselt", "Luik", None], dtype=object)
+    afzenders = np.array(["", "Firma A", "Firma B"], dtype=object)
+    if met_speciale_tekens:
+        plaatsen[-1] = "Bree & Peer"
+        afzenders = np.array(["", "-> Firma A", "<- Firma B & Zn"], dtype=object)
+    lm = rng.uniform(0, 13.6, rijen).round(2)
+    lm[rng.random(rijen) < 0.05] = np.nan
+    return pd.DataFrame({
+        "Verzending-ID": np.arange(rijen) + 5_000_000,
+        "Type": rng.choice(["Laden", "Lossen"], rijen),
+        "PC": rng.integers(1000, 9999, rijen).astype(str),
+        "Plaatsnaam": plaatsen[rng.integers(0, len(plaatsen), rijen)],
+        "Kg": rng.integers(10, 24_000, rijen),
+        "LM": lm,
+        "Aantal": rng.integers(1, 33, rijen),
+        "Goederen": rng.choice(["Pallets", "Colli", "Rollen"], rijen),
+        "ETA": pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 72, rijen), unit="h"),
+        "Afzender": afzenders[rng.integers(0, len(afzenders), rijen)],
+    })
+
+
+def oud(overzicht: pd.DataFrame) -> str:
+    """bouw_html_tabel() vóór de opbouw per kolom."""
+    kolom_stijl = (
+        "border:1px solid #cccccc; padding:6px 10px; "
+        "font-family:Calibri,Arial,sans-serif; font-size:11pt;"
+    )
+    header_stijl = kolom_stijl + " background-color:#1F4E78; color:#ffffff; text-align:left;"
+
+    html = ['<table style="border-collapse:collapse; width:100%;">', "<tr>"]
+    for kol in overzicht.columns:
+        html.append(f'<th style="{header_stijl}">{kol}</th>')
+    html.append("</tr>")
+
+    for i, (_, row) in enumerate(overzicht.iterrows()):
+        rij_kleur = "#ffffff" if i % 2 == 0 else "#F2F2F2"
+        html.append("<tr>")
+        for kol in overzicht.columns:
+            waarde = row[kol]
+            waarde = "" if pd.isna(waarde) else waarde
+            html.append(f'<td style="{kolom_stijl} background-color:{rij_kleur};">{waarde}</td>')
+        html.append("</tr>")
+
+    html.append("</table>")
+    return "".join(html)
+
+
+def ge_escaped(overzicht: pd.DataFrame) -> pd.DataFrame:
+    return overzicht.apply(lambda kolom: kolom.map(lambda w: escape(w, quote=False) if isinstance(w, str) else w))
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    gewoon = maak_overzicht(AANTALLEN_RIJEN[0], met_speciale_tekens=False)
+    assert oud(gewoon) == bouw_html_tabel(gewoon)
+    speciaal = maak_overzicht(AANTALLEN_RIJEN[0], met_speciale_tekens=True)
+    assert oud(ge_escaped(speciaal)) == bouw_html_tabel(speciaal)
+    assert oud(speciaal) != bouw_html_tabel(speciaal)
+
+    print("rijen     iterrows (s)  per kolom (s)")
+    for rijen in AANTALLEN_RIJEN:
+        overzicht = maak_overzicht(rijen, met_speciale_tekens=True)
+        print(f"{rijen:>6}  {meet(lambda: oud(overzicht)):>14.3f}  {meet(lambda: bouw_html_tabel(overzicht)):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark: Klant × Maand-tabel in Aantal_Omzet.py.
+
+Vergelijkt de oude opbouw (per klant .loc per maand en een pd.concat per
+rij) met bouw_klant_maand_tabel() uit omzet_analyse.py op gegenereerde
+pivots, en controleert dat beide dezelfde tabel geven.
+
+    python benchmarks/klant_maand_tabel.py"""
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from omzet_analyse import bouw_klant_maand_tabel  # noqa: E402
+
+MAANDEN = 36
+KLANTEN_OUD = [100, 500]
+KLANTEN_NIEUW = [100, 500, 10_000]
+
+
+def maak_pivots(aantal_klanten: int) -> tuple[pd.DataFrame, pd.DataFrame, list, list]:
+    rng = np.random.default_rng(0)
+    klanten = [f"Klant {i:05d}" for i in range(aantal_klanten)]
+    jaarmaanden = list(pd.date_range("2022-01-01", periods=MAANDEN, freq="MS"))
+    # Zoals in een echte export heeft niet elke klant elke maand files
+    aantal = rng.integers(0, 40, (aantal_klanten, MAANDEN)) * (rng.random((aantal_klanten, MAANDEN)) < 0.6)
+    omzet = (aantal * rng.uniform(50, 500, (aantal_klanten, MAANDEN))).round(2)
+    pivot_aantal = pd.DataFrame(aantal, index=klanten, columns=jaarmaanden)
+    pivot_omzet = pd.DataFrame(omzet, index=klanten, columns=jaarmaanden)
+    return pivot_aantal, pivot_omzet, klanten, jaarmaanden
+
+
+def oud(pivot_aantal, pivot_omzet, klanten, jaarmaanden) -> pd.DataFrame:
+    """De lus uit Aantal_Omzet.py vóór bouw_klant_maand_tabel()."""
+    final_columns_order = ['Klantnaam']
+    for jm in jaarmaanden:
+        final_columns_order.append(f"{jm.strftime('%Y-%m')} A")
+        final_columns_order.append(f"{jm.strftime('%Y-%m')} O")
+    result_df = pd.DataFrame(columns=final_columns_order)
+    for klantnaam in klanten:
+        row_data = {'Klantnaam': klantnaam}
+        for jm in jaarmaanden:
+            aantal = pivot_aantal.loc[klantnaam, jm] if jm in pivot_aantal.columns and klantnaam in pivot_aantal.index else 0
+            omzet = pivot_omzet.loc[klantnaam, jm] if jm in pivot_omzet.columns and klantnaam in pivot_omzet.index else 0
+            row_data[f"{jm.strftime('%Y-%m')} A"] = aantal
+            row_data[f"{jm.strftime('%Y-%m')} O"] = omzet
+        result_df = pd.concat([result_df, pd.DataFrame([row_data])], ignore_index=True)
+    return result_df
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    argumenten = maak_pivots(KLANTEN_OUD[0])
+    pd.testing.assert_frame_equal(
+        oud(*argumenten).set_index('Klantnaam').astype(float),
+        bouw_klant_maand_tabel(*argumenten).set_index('Klantnaam').astype(float),
+        check_index_type=False,  # de oude lus geeft object, de nieuwe str
+    )
+
+    print(f"{MAANDEN} maanden   per klant (s)  in één keer (s)")
+    for aantal_klanten in KLANTEN_NIEUW:
+        argumenten = maak_pivots(aantal_klanten)
+        tijd_oud = f"{meet(lambda: oud(*argumenten)):>13.3f}" if aantal_klanten in KLANTEN_OUD else f"{'-':>13}"
+        print(f"{aantal_klanten:>6} klanten {tijd_oud}  {meet(lambda: bouw_klant_maand_tabel(*argumenten)):>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark: piekgeheugen van het gestreamde inlezen in Aantal_Omzet.py.
+
+Vergelijkt de samenvatting via het gewone inlezen (inlezen._parse van het
+hele bestand, daarna verwerk_status en maak_samenvatting) met
+lees_samenvatting_gestreamd() uit omzet_analyse.py, die het bestand blok
+per blok doorloopt. Elke variant draait in een eigen proces, zodat het
+piekgeheugen (ru_maxrss) niet door een vorige variant vertekend wordt.
+Controleert daarna dat alle varianten dezelfde samenvatting geven.
+
+    python benchmarks/omzet_gestreamd.py [rijen] [kolommen]
+
+Het gegenereerde bestand wordt bewaard in de tijdelijke map en bij een
+volgende run hergebruikt."""
+import importlib.util
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+RIJEN = 300_000
+KOLOMMEN = 20
+
+# Zoals Aantal_Omzet.py
+SCHEMA = {
+    "verplicht": ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status'],
+    "optioneel": ['Dossiernr'],
+    "dtype": {'Klantnaam': str},
+    "categorisch": ['Klantnaam'],
+}
+
+
+def bestand(rijen: int, kolommen: int) -> Path:
+    pad = Path(tempfile.gettempdir()) / f"benchmark_omzet_{rijen}x{kolommen}.xlsx"
+    if pad.exists():
+        return pad
+
+    import random
+    from datetime import datetime, timedelta
+
+    from openpyxl import Workbook
+
+    rnd = random.Random(0)
+    vast = SCHEMA["verplicht"] + SCHEMA["optioneel"]
+    extra = [f"Kolom {i}" for i in range(kolommen - len(vast))]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(vast + extra)
+    begin = datetime(2022, 1, 1)
+    for i in range(rijen):
+        omzet = 0 if rnd.random() < 0.05 else round(rnd.random() * 2000, 2)
+        ws.append([
+            f"Klant {rnd.randrange(800)}",
+            begin + timedelta(minutes=5 * i),
+            omzet,
+            rnd.choice([10, 10, 10, 20, 30]),
+            3_000_000 + i,
+        ] + [(f"Tekst {rnd.randrange(500)}", rnd.random() * 1000, i)[j % 3] for j in range(len(extra))])
+    tijdelijk = pad.with_suffix(".tmp")
+    wb.save(tijdelijk)
+    tijdelijk.replace(pad)
+    return pad
+
+
+def variant(naam: str, pad: Path, uitvoer: Path) -> None:
+    """Eén meting, in dit (verse) proces; print seconden en piek-MB en
+    bewaart de samenvatting in 'uitvoer' voor de vergelijking."""
+    import inlezen
+    from omzet_analyse import lees_samenvatting_gestreamd, maak_samenvatting, verwerk_status
+
+    start = time.perf_counter()
+    if naam == "gestreamd":
+        with open(pad, "rb") as f:
+            samenvatting = lees_samenvatting_gestreamd(f, SCHEMA)
+    else:
+        inlezen.ENGINE = "calamine" if naam == "normaal_calamine" else None
+        samenvatting = maak_samenvatting(verwerk_status(inlezen._parse(pad.read_bytes(), SCHEMA)))
+    duur = time.perf_counter() - start
+    piek = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB op Linux
+    uitvoer.write_bytes(pickle.dumps(samenvatting))
+    print(f"{duur:.2f} {piek:.0f}")
+
+
+def vergelijk(a: dict, b: dict) -> None:
+    import pandas as pd
+
+    assert a["rijen"] == b["rijen"]
+    assert [str(k) for k in a["klanten"]] == [str(k) for k in b["klanten"]]
+
+    # Het gewone inlezen geeft een categorische Klantnaam, het gestreamde tekst
+    def als_tabel(df: pd.DataFrame) -> pd.DataFrame:
+        return df.astype({"Klantnaam": str}).sort_values(list(df.columns)).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(
+        als_tabel(a["per_klant_maand"].reset_index()), als_tabel(b["per_klant_maand"].reset_index()), check_dtype=False
+    )
+    pd.testing.assert_series_equal(a["per_maand"].sort_index(), b["per_maand"].sort_index(), check_dtype=False)
+    pd.testing.assert_frame_equal(
+        a["nul_omzet"].reset_index(drop=True).astype({"Klantnaam": str}),
+        b["nul_omzet"].reset_index(drop=True).astype({"Klantnaam": str}),
+        check_dtype=False,
+    )
+
+
+def main() -> None:
+    if len(sys.argv) == 5 and sys.argv[1] == "--variant":
+        variant(sys.argv[2], Path(sys.argv[3]), Path(sys.argv[4]))
+        return
+
+    rijen = int(sys.argv[1]) if len(sys.argv) > 1 else RIJEN
+    kolommen = int(sys.argv[2]) if len(sys.argv) > 2 else KOLOMMEN
+    pad = bestand(rijen, kolommen)
+
+    varianten = ["normaal_openpyxl", "gestreamd"]
+    if importlib.util.find_spec("python_calamine"):
+        varianten.insert(1, "normaal_calamine")
+
+    print(f"{rijen} rijen x {kolommen} kolommen ({pad.stat().st_size / 1e6:.0f} MB xlsx)")
+    print(f"{'variant':<17} {'tijd (s)':>9} {'piek (MB)':>10}")
+    samenvattingen = []
+    with tempfile.TemporaryDirectory() as map_:
+        for naam in varianten:
+            uitvoer = Path(map_) / f"{naam}.pkl"
+            duur, piek = subprocess.run(
+                [sys.executable, __file__, "--variant", naam, str(pad), str(uitvoer)],
+                capture_output=True, text=True, check=True,
+            ).stdout.split()[-2:]
+            print(f"{naam:<17} {float(duur):>9.2f} {float(piek):>10.0f}")
+            samenvattingen.append(pickle.loads(uitvoer.read_bytes()))
+
+    for samenvatting in samenvattingen[1:]:
+        vergelijk(samenvattingen[0], samenvatting)
+    print("samenvattingen gelijk")
+
+
+if __name__ == "__main__":
+    main()
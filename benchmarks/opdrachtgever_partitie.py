@@ -0,0 +1,56 @@
+"""Benchmark: subsets per opdrachtgever in ClientOrders.py.
+
+Vergelijkt een filter per opdrachtgever (df[df["Opdrachtgever"] == code],
+het oude gedrag) met één partitie-stap (verdeel_per_opdrachtgever) en een
+iloc per opdrachtgever, op een gegenereerde export van 100k regels met
+steeds meer opdrachtgevers. De partitie-stap zelf hoort vlak te blijven;
+de iloc's kosten enkel per opdrachtgever, niet per regel van het bestand.
+
+    python benchmarks/opdrachtgever_partitie.py"""
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from opdrachtgever_mail import verdeel_per_opdrachtgever  # noqa: E402
+
+RIJEN = 100_000
+AANTALLEN_OPDRACHTGEVERS = [10, 100, 300, 1000]
+
+
+def maak_export(opdrachtgevers: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Opdrachtgever": rng.integers(1_000_000, 1_000_000 + opdrachtgevers, RIJEN).astype(str),
+        "Dossiernr": np.arange(RIJEN),
+        "Type": rng.choice(["Laden", "Lossen"], RIJEN),
+    })
+
+
+def per_filter(df: pd.DataFrame, codes: list) -> int:
+    return sum(len(df[df["Opdrachtgever"] == code]) for code in codes)
+
+
+def per_partitie(df: pd.DataFrame, codes: list) -> int:
+    partities = verdeel_per_opdrachtgever(df)
+    return sum(len(df.iloc[partities[code]]) for code in codes if code in partities)
+
+
+def main() -> None:
+    print(f"{'opdrachtgevers':>14} {'filter (s)':>11} {'partitie (s)':>13} {'+ iloc (s)':>11}")
+    for aantal in AANTALLEN_OPDRACHTGEVERS:
+        df = maak_export(aantal)
+        codes = list(pd.unique(df["Opdrachtgever"]))
+        assert per_filter(df, codes) == per_partitie(df, codes) == RIJEN
+        oud = min(timeit.repeat(lambda: per_filter(df, codes), number=1, repeat=3))
+        stap = min(timeit.repeat(lambda: verdeel_per_opdrachtgever(df), number=1, repeat=3))
+        nieuw = min(timeit.repeat(lambda: per_partitie(df, codes), number=1, repeat=3))
+        print(f"{aantal:>14} {oud:>11.3f} {stap:>13.3f} {nieuw:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
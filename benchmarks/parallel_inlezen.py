@@ -0,0 +1,130 @@
+"""Benchmark: meerdere exports tegelijk inlezen met lees_excel_bestanden.
+
+Leest een jaar aan maandexports (standaard 12 bestanden van 20k regels)
+één keer na elkaar in dit proces en daarna via de procespool met 1, 2, 4
+... werkers (tot het aantal kernen), telkens met lege caches. Daarnaast
+wordt gemeten hoe lang het heen en weer sturen (pickle) van de ingelezen
+DataFrames kost: dat is wat de pool extra betaalt tegenover inlezen in
+hetzelfde proces.
+
+    python benchmarks/parallel_inlezen.py [bestanden] [rijen] [--engine=openpyxl]
+
+Elke engine draait in een eigen proces met EXCEL_ENGINE gezet, zodat ook
+de werkers die engine gebruiken."""
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BESTANDEN = 12
+RIJEN = 20_000
+
+SCHEMA = {
+    "verplicht": ["Klantnaam", "Laaddatum", "Prest. Eigen Bedrijf", "Dossier Fin. Status"],
+    "optioneel": ["Dossiernr"],
+    "dtype": {"Klantnaam": str},
+}
+EXTRA_KOLOMMEN = 6
+
+
+def maak_bestanden(aantal: int, rijen: int) -> list[Path]:
+    import random
+    from datetime import datetime, timedelta
+
+    from openpyxl import Workbook
+
+    map_ = Path(tempfile.gettempdir()) / f"benchmark_maanden_{rijen}"
+    map_.mkdir(exist_ok=True)
+    paden = []
+    for maand in range(aantal):
+        pad = map_ / f"export_{maand + 1:02d}.xlsx"
+        paden.append(pad)
+        if pad.exists():
+            continue
+        rnd = random.Random(maand)
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(SCHEMA["verplicht"] + SCHEMA["optioneel"] + [f"Kolom {i}" for i in range(EXTRA_KOLOMMEN)])
+        begin = datetime(2024, 1, 1) + timedelta(days=31 * maand)
+        for i in range(rijen):
+            ws.append([
+                f"Klant {rnd.randrange(800)}",
+                begin + timedelta(minutes=rnd.randrange(40000)),
+                round(rnd.random() * 900, 2),
+                rnd.choice([10, 20, 30]),
+                maand * rijen + i,
+                *[f"Tekst {rnd.randrange(100)}" if j % 2 else rnd.random() for j in range(EXTRA_KOLOMMEN)],
+            ])
+        tijdelijk = pad.with_suffix(".tmp")
+        wb.save(tijdelijk)
+        tijdelijk.replace(pad)
+    return paden
+
+
+def meet(paden: list[Path]) -> None:
+    """Alle metingen voor de engine uit EXCEL_ENGINE, in dit proces."""
+    os.environ["EXCEL_CACHE_MAP"] = tempfile.mkdtemp(prefix="benchmark_cache_")
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import inlezen
+
+    inhoud = [pad.read_bytes() for pad in paden]
+
+    def leeg():
+        inlezen.wis_cache()
+        inlezen.wis_schijfcache()
+
+    # Zelfde werk als de pool (inclusief wegschrijven naar de caches), maar na elkaar
+    leeg()
+    start = time.perf_counter()
+    frames = [inlezen.lees_excel(b, SCHEMA) for b in inhoud]
+    na_elkaar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for df in frames:
+        pickle.loads(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    heen_en_terug = time.perf_counter() - start
+
+    print(f"engine: {inlezen.ENGINE or 'standaard'}, {len(paden)} bestanden, {os.cpu_count()} kern(en)")
+    print(f"{'werkwijze':<22} {'tijd (s)':>9} {'versnelling':>12}")
+    print(f"{'na elkaar':<22} {na_elkaar:>9.2f} {1:>12.2f}")
+
+    werkers = 1
+    while True:
+        leeg()
+        start = time.perf_counter()
+        resultaten = inlezen.lees_excel_bestanden(inhoud, SCHEMA, max_workers=werkers)
+        duur = time.perf_counter() - start
+        assert all(fout is None for _, fout in resultaten)
+        print(f"{f'pool, {werkers} werker(s)':<22} {duur:>9.2f} {na_elkaar / duur:>12.2f}")
+        if werkers >= (os.cpu_count() or 1):
+            break
+        werkers = min(werkers * 2, os.cpu_count() or 1)
+
+    print(f"pickle heen en terug van alle DataFrames: {heen_en_terug:.2f} s")
+
+
+def main() -> None:
+    argumenten = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--meet" in sys.argv:
+        meet([Path(p) for p in argumenten])
+        return
+
+    aantal = int(argumenten[0]) if argumenten else BESTANDEN
+    rijen = int(argumenten[1]) if len(argumenten) > 1 else RIJEN
+    engines = [a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--engine=")] or ["calamine", "openpyxl"]
+
+    paden = maak_bestanden(aantal, rijen)
+    for engine in engines:
+        subprocess.run(
+            [sys.executable, __file__, "--meet", *map(str, paden)],
+            env={**os.environ, "EXCEL_ENGINE": engine},
+            check=True,
+        )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cachetest: haal_sharepoint_excel_op() uit sharepoint.py tegen een lokale
+HTTP-server (http.server), zonder SharePoint.
+
+De server geeft het bestand met een ETag en antwoordt 304 als de
+If-None-Match nog klopt. Gecontroleerd wordt dat de eerste oproep het
+bestand downloadt (200), een herhaling binnen de TTL geen verzoek doet,
+een herhaling na de TTL een 304 krijgt en de gecachte inhoud teruggeeft,
+en een gewijzigd bestand opnieuw gedownload wordt. De tijd per soort
+oproep wordt getoond.
+
+    python benchmarks/sharepoint_cache.py"""
+import hashlib
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sharepoint import haal_sharepoint_excel_op, wis_cache  # noqa: E402
+
+GROOTTE = 5_000_000  # bytes, ongeveer een flinke export
+TTL = 0.5
+
+
+class Bestand:
+    """Wat de server teruggeeft, en de statuscodes van de verzoeken."""
+
+    inhoud = b""
+    statussen = []
+
+    @classmethod
+    def zet(cls, inhoud: bytes) -> None:
+        cls.inhoud = inhoud
+
+    @classmethod
+    def etag(cls) -> str:
+        return '"' + hashlib.sha1(cls.inhoud).hexdigest() + '"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == Bestand.etag():
+            Bestand.statussen.append(304)
+            self.send_response(304)
+            self.send_header("ETag", Bestand.etag())
+            self.end_headers()
+            return
+        Bestand.statussen.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        self.send_header("Content-Length", str(len(Bestand.inhoud)))
+        self.send_header("ETag", Bestand.etag())
+        self.end_headers()
+        self.wfile.write(Bestand.inhoud)
+
+    def log_message(self, *args):
+        pass
+
+
+def oproep(url: str, sessie: requests.Session) -> tuple[bytes, str, float]:
+    start = time.perf_counter()
+    inhoud, versie = haal_sharepoint_excel_op(url, ttl=TTL, sessie=sessie)
+    return inhoud, versie, time.perf_counter() - start
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/export.xlsx"
+    sessie = requests.Session()
+    wis_cache()
+
+    try:
+        Bestand.zet(bytes(range(256)) * (GROOTTE // 256))
+
+        inhoud, versie, duur_200 = oproep(url, sessie)
+        assert Bestand.statussen == [200] and inhoud == Bestand.inhoud
+
+        inhoud, tweede_versie, duur_cache = oproep(url, sessie)
+        assert Bestand.statussen == [200], "binnen de TTL mag er geen verzoek vertrekken"
+        assert tweede_versie == versie
+
+        time.sleep(TTL)
+        inhoud, derde_versie, duur_304 = oproep(url, sessie)
+        assert Bestand.statussen == [200, 304] and inhoud == Bestand.inhoud and derde_versie == versie
+
+        Bestand.zet(Bestand.inhoud[::-1])
+        time.sleep(TTL)
+        inhoud, nieuwe_versie, _ = oproep(url, sessie)
+        assert Bestand.statussen == [200, 304, 200] and inhoud == Bestand.inhoud and nieuwe_versie != versie
+    finally:
+        sessie.close()
+        server.shutdown()
+        server.server_close()
+        wis_cache()
+
+    print(f"{GROOTTE / 1e6:.0f} MB bestand           tijd (ms)")
+    print(f"eerste oproep (200)      {duur_200 * 1000:>9.1f}")
+    print(f"binnen de TTL (cache)    {duur_cache * 1000:>9.3f}")
+    print(f"na de TTL (304)          {duur_304 * 1000:>9.1f}")
+    print("200 -> cache -> 304 -> 200 na wijziging: ok")
+
+
+if __name__ == "__main__":
+    main()
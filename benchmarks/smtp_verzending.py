@@ -0,0 +1,106 @@
+"""Verzendtest: verzend_mails() uit smtp_verzending.py tegen een lokale
+SMTP-server (aiosmtpd), zonder echte mailserver.
+
+De server weigert het eerste bericht voor één adres tijdelijk (451, zoals
+bij rate limiting); dat bericht moet bij de tweede poging vertrekken. Een
+server zonder AUTH laat daarna zien dat een mislukte login als fout per
+bericht terugkomt. Per aantal verbindingen wordt de doorvoer getoond.
+
+    python benchmarks/smtp_verzending.py
+
+Vereist aiosmtpd (pip install aiosmtpd)."""
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("Deze test vereist aiosmtpd: pip install aiosmtpd")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from opdrachtgever_mail import bouw_eml  # noqa: E402
+from smtp_verzending import maak_bericht, verzend_mails  # noqa: E402
+
+BERICHTEN = 200
+AANTALLEN_VERBINDINGEN = [1, 4]
+TIJDELIJK_GEWEIGERD = "traag@voorbeeld.be"
+
+
+class Ontvanger:
+    """aiosmtpd-handler die ontvangen adressen bijhoudt en het eerste
+    bericht voor TIJDELIJK_GEWEIGERD met 451 weigert."""
+
+    def __init__(self):
+        self.ontvangen = []
+        self.geweigerd = 0
+        self.lock = threading.Lock()
+
+    async def handle_DATA(self, server, session, envelope):
+        with self.lock:
+            if TIJDELIJK_GEWEIGERD in envelope.rcpt_tos and not self.geweigerd:
+                self.geweigerd += 1
+                return "451 4.7.1 Probeer later opnieuw"
+            self.ontvangen.extend(envelope.rcpt_tos)
+        return "250 OK"
+
+
+def start_server(ontvanger: Ontvanger) -> tuple[Controller, int]:
+    # Controller kan niet met poort 0 starten; eerst een vrije poort zoeken
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        poort = s.getsockname()[1]
+    server = Controller(ontvanger, hostname="127.0.0.1", port=poort)
+    server.start()
+    return server, poort
+
+
+def maak_berichten(aantal: int) -> list:
+    html = "<table>" + "<tr><td>regel</td></tr>" * 200 + "</table>"
+    adressen = [TIJDELIJK_GEWEIGERD] + [f"klant{i}@voorbeeld.be" for i in range(1, aantal)]
+    return [
+        (adres, maak_bericht(bouw_eml(adres, f"Overzicht {i}", html), "planning@voorbeeld.be"))
+        for i, adres in enumerate(adressen)
+    ]
+
+
+def main() -> None:
+    berichten = maak_berichten(BERICHTEN)
+
+    print(f"{BERICHTEN} berichten   tijd (s)  berichten/s")
+    for verbindingen in AANTALLEN_VERBINDINGEN:
+        ontvanger = Ontvanger()
+        server, poort = start_server(ontvanger)
+        try:
+            start = time.perf_counter()
+            statussen = verzend_mails(
+                berichten, host="127.0.0.1", port=poort,
+                starttls=False, max_verbindingen=verbindingen, wachttijd=0.05,
+            )
+            duur = time.perf_counter() - start
+        finally:
+            server.stop()
+
+        assert all(status["Status"] == "Verzonden" for status in statussen), statussen
+        assert statussen[0]["Pogingen"] == 2 and ontvanger.geweigerd == 1
+        assert sorted(ontvanger.ontvangen) == sorted(adres for adres, _ in berichten)
+        print(f"{verbindingen} verbinding(en) {duur:>8.2f}  {BERICHTEN / duur:>11.0f}")
+
+    # Login op een server zonder AUTH: fout per bericht, geen herhaling
+    server, poort = start_server(Ontvanger())
+    try:
+        statussen = verzend_mails(
+            berichten[:3], host="127.0.0.1", port=poort,
+            starttls=False, gebruiker="planning", wachtwoord="geheim", wachttijd=0.05,
+        )
+    finally:
+        server.stop()
+    assert all(status["Status"] == "Mislukt" and status["Pogingen"] == 1 for status in statussen), statussen
+    print("herhaling na 451 en mislukte login: ok")
+
+
+if __name__ == "__main__":
+    main()
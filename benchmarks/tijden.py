@@ -0,0 +1,74 @@
+"""Micro-benchmark: wachttijd uit Arrival/Departure (zie tijden.py).
+
+Vergelijkt de oude berekening in CSGenk.py (pd.to_timedelta op de kolom
+als tekst) met wachttijd() op gegenereerde tijden in de vormen die een
+Excel-export kan geven: tekst, datetime.time-objecten en Excel-getallen
+(fractie van een dag; die kon de oude berekening niet lezen). Vertrek ligt
+hier altijd na aankomst, zodat beide hetzelfde resultaat moeten geven.
+
+    python benchmarks/tijden.py"""
+import datetime
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tijden import DAG, wachttijd  # noqa: E402
+
+RIJEN = 1_000_000
+
+
+def maak_seconden() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    aankomst = rng.integers(0, DAG - 4 * 3600, RIJEN)
+    vertrek = aankomst + rng.integers(0, 4 * 3600, RIJEN)
+    return aankomst, vertrek
+
+
+def als_tekst(seconden: np.ndarray) -> pd.Series:
+    return pd.Series([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in seconden.tolist()], dtype="str")
+
+
+def als_tijd(seconden: np.ndarray) -> pd.Series:
+    return pd.Series([datetime.time(s // 3600, s // 60 % 60, s % 60) for s in seconden.tolist()], dtype=object)
+
+
+def als_getal(seconden: np.ndarray) -> pd.Series:
+    return pd.Series(seconden / DAG)
+
+
+def oud(aankomst: pd.Series, vertrek: pd.Series) -> pd.Series:
+    """De berekening uit CSGenk.py vóór tijden.py."""
+    return (pd.to_timedelta(vertrek.astype(str)) - pd.to_timedelta(aankomst.astype(str))).dt.total_seconds() / 3600
+
+
+def meet(functie) -> float:
+    return min(timeit.repeat(functie, number=1, repeat=3))
+
+
+def main() -> None:
+    aankomst, vertrek = maak_seconden()
+    verwacht = (vertrek - aankomst) / 3600
+
+    print(f"{RIJEN} rijen      to_timedelta (s)  wachttijd (s)")
+    for naam, vorm, oud_leesbaar in [
+        ("tekst", als_tekst, True),
+        ("time-objecten", als_tijd, True),
+        ("Excel-getallen", als_getal, False),
+    ]:
+        van, tot = vorm(aankomst), vorm(vertrek)
+        assert np.allclose(wachttijd(van, tot)["Wait_Hours"].to_numpy(), verwacht)
+        if oud_leesbaar:
+            assert np.allclose(oud(van, tot).to_numpy(), verwacht)
+            tijd_oud = f"{meet(lambda: oud(van, tot)):>16.3f}"
+        else:
+            tijd_oud = f"{'-':>16}"
+        print(f"{naam:<18} {tijd_oud}  {meet(lambda: wachttijd(van, tot)):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Gedeeld inlezen van Excel-bestanden voor alle apps.
+
+Streamlit voert het volledige script opnieuw uit bij elke wijziging in de
+sidebar; zonder cache wordt het geüploade bestand dan telkens opnieuw door
+openpyxl geparsed. Hier wordt het resultaat bewaard per inhoud van het
+bestand (hash) en per gevraagde kolommen/dtypes, in een LRU-cache met een
+maximum geheugengebruik die gedeeld wordt door alle sessies en apps van
+hetzelfde serverproces.
+
+Elke app beschrijft met een schema welke kolommen ze nodig heeft:
+
+    SCHEMA = {
+        "verplicht": ["Klantnaam", "Laaddatum"],   # moeten in het bestand staan
+        "optioneel": ["Dossiernr"],                # worden gelezen als ze bestaan
+        "dtype": {"Klantnaam": str},               # vaste types i.p.v. inferentie
+        "categorisch": ["Klantnaam"],              # herhaalde tekst als categorie
+    }
+
+Enkel die kolommen worden bewaard (usecols), zodat de gecachte DataFrame
+bij brede TMS-exports veel kleiner is; met "alle_kolommen": True worden
+toch alle kolommen gelezen (bv. voor een weergave van de brongegevens). Is
+python-calamine geïnstalleerd, dan wordt die (veel snellere) engine
+gebruikt in plaats van openpyxl. openpyxl leest ook met usecols elke cel;
+calamine laadt het hele blad in het geheugen, dus de piek tijdens het
+inlezen ligt daar hoger (zie benchmarks/excel_inlezen.py).
+
+Kolommen onder "categorisch" (klanten, types, plaatsnamen, ...) worden bij
+het inlezen één keer omgezet naar een categorische kolom: elke waarde
+wordt dan als een klein geheel getal bewaard, wat geheugen bespaart en
+groupby's laat werken op die codes in plaats van telkens de tekst te
+hashen. Groepeer op zulke kolommen met observed=True.
+
+Daarnaast wordt elk omgezet bestand (als pyarrow beschikbaar is) ook als
+Arrow-bestand in een lokale cachemap bewaard. Een volgende sessie of een
+andere app die hetzelfde bestand uploadt, leest dat Arrow-bestand in
+plaats van de xlsx opnieuw te parsen: veel sneller, maar de DataFrame
+staat daarna wel volledig in het geheugen (to_pandas kopieert de
+gegevens). Beheer van die map:
+
+    python inlezen.py --overzicht
+    python inlezen.py --wis"""
+import argparse
+import hashlib
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # zonder pyarrow enkel de cache in het geheugen
+    feather = None
+
+# Maximum geheugen (in MB) voor alle gecachte DataFrames samen.
+MAX_CACHE_MB = int(os.environ.get("EXCEL_CACHE_MB", 512))
+
+# Map en maximale grootte (in MB) van de Arrow-cache op schijf.
+CACHE_MAP = Path(
+    os.environ.get("EXCEL_CACHE_MAP", Path(tempfile.gettempdir()) / "tuf_excel_cache")
+)
+MAX_SCHIJF_MB = int(os.environ.get("EXCEL_SCHIJF_MB", 2048))
+
+# Snellere Rust-engine als die beschikbaar is (pandas >= 2.2), anders de standaard.
+# EXCEL_ENGINE legt de engine vast (bv. "openpyxl"), ook in de werkprocessen.
+ENGINE = os.environ.get("EXCEL_ENGINE") or ("calamine" if importlib.util.find_spec("python_calamine") else None)
+
+# Werkers voor lees_excel_bestanden. Niet met fork: het Streamlit-proces
+# heeft meerdere threads, en een geforkt kind kan een vastgehouden lock
+# erven. forkserver waar het bestaat, anders spawn.
+_PROCES_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# sleutel -> (DataFrame, grootte in bytes); meest recent gebruikt achteraan
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def lees_bytes(bestand) -> bytes:
+    """Geeft de volledige inhoud van een upload (Streamlit UploadedFile,
+    BytesIO of bytes) terug."""
+    if isinstance(bestand, (bytes, bytearray)):
+        return bytes(bestand)
+    if hasattr(bestand, "getvalue"):
+        return bestand.getvalue()
+    bestand.seek(0)
+    return bestand.read()
+
+
+def schema_kolommen(schema: dict) -> list:
+    """Alle kolommen die volgens het schema ingelezen moeten worden."""
+    return list(schema.get("verplicht", [])) + list(schema.get("optioneel", []))
+
+
+def ontbrekende_kolommen(df: pd.DataFrame, schema: dict) -> list:
+    """Verplichte kolommen uit het schema die niet in 'df' voorkomen."""
+    return [kol for kol in schema.get("verplicht", []) if kol not in df.columns]
+
+
+def _cache_sleutel(inhoud: bytes, schema: dict | None) -> tuple:
+    if schema is None:
+        return (hashlib.sha256(inhoud).hexdigest(), None, None)
+    return (
+        hashlib.sha256(inhoud).hexdigest(),
+        None if schema.get("alle_kolommen") else tuple(schema_kolommen(schema)),
+        tuple(sorted((k, str(v)) for k, v in schema.get("dtype", {}).items())),
+        tuple(schema.get("categorisch", [])),
+    )
+
+
+def _parse(inhoud: bytes, schema: dict | None) -> pd.DataFrame:
+    opties = {}
+    if schema is not None:
+        if not schema.get("alle_kolommen"):
+            gewenst = set(schema_kolommen(schema))
+            # Een callable i.p.v. een lijst: ontbrekende kolommen geven geen fout,
+            # zodat de app zelf een duidelijke melding kan tonen.
+            opties["usecols"] = lambda kol: kol in gewenst
+        opties["dtype"] = schema.get("dtype") or None
+
+    df = None
+    if ENGINE is not None:
+        try:
+            df = pd.read_excel(BytesIO(inhoud), engine=ENGINE, **opties)
+        except Exception:
+            pass  # bv. een bestand dat calamine niet aankan: terugvallen op de standaard
+    if df is None:
+        df = pd.read_excel(BytesIO(inhoud), **opties)
+
+    if schema is not None:
+        for kol in schema.get("categorisch", []):
+            if kol in df.columns:
+                df[kol] = df[kol].astype("category")
+    return df
+
+
+def _schijf_pad(sleutel: tuple) -> Path:
+    return CACHE_MAP / (hashlib.sha256(repr(sleutel).encode()).hexdigest() + ".arrow")
+
+
+def _lees_van_schijf(sleutel: tuple) -> pd.DataFrame | None:
+    if feather is None:
+        return None
+    pad = _schijf_pad(sleutel)
+    try:
+        tabel = feather.read_table(pad, memory_map=True)
+        os.utime(pad)  # laatst gebruikt, voor het opruimen van de oudste bestanden
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    return tabel.to_pandas()
+
+
+def _schrijf_naar_schijf(sleutel: tuple, df: pd.DataFrame) -> None:
+    if feather is None:
+        return
+    pad = _schijf_pad(sleutel)
+    tijdelijk = pad.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        CACHE_MAP.mkdir(parents=True, exist_ok=True)
+        # Zonder compressie, zodat inlezen geen decompressie vraagt.
+        feather.write_feather(df, tijdelijk, compression="uncompressed")
+        os.replace(tijdelijk, pad)
+    except Exception:
+        # Bv. kolommen met gemengde types die Arrow niet aankan: dan enkel
+        # de cache in het geheugen gebruiken.
+        tijdelijk.unlink(missing_ok=True)
+        return
+    _ruim_schijf_op()
+
+
+def _cachebestanden() -> list[tuple[Path, os.stat_result]]:
+    """De Arrow-bestanden met hun stat, oudst gebruikte eerst. Een bestand
+    dat ondertussen door een andere sessie verwijderd werd, wordt
+    overgeslagen."""
+    bestanden = []
+    for pad in CACHE_MAP.glob("*.arrow"):
+        try:
+            bestanden.append((pad, pad.stat()))
+        except FileNotFoundError:
+            continue
+    return sorted(bestanden, key=lambda item: item[1].st_mtime)
+
+
+def _ruim_schijf_op() -> None:
+    """Verwijdert de langst niet gebruikte bestanden tot de map weer onder
+    MAX_SCHIJF_MB zit."""
+    bestanden = _cachebestanden()
+    totaal = sum(status.st_size for _, status in bestanden)
+    max_bytes = MAX_SCHIJF_MB * 1024 * 1024
+    for pad, status in bestanden:
+        if totaal <= max_bytes:
+            break
+        totaal -= status.st_size
+        pad.unlink(missing_ok=True)
+
+
+def schijfcache_overzicht() -> pd.DataFrame:
+    """Overzicht van de bestanden in de Arrow-cache op schijf."""
+    return pd.DataFrame(
+        [
+            {
+                "Bestand": pad.name,
+                "Grootte (MB)": round(status.st_size / 1024 / 1024, 2),
+                "Laatst gebruikt": time.strftime("%Y-%m-%d %H:%M", time.localtime(status.st_mtime)),
+            }
+            for pad, status in reversed(_cachebestanden())
+        ],
+        columns=["Bestand", "Grootte (MB)", "Laatst gebruikt"],
+    )
+
+
+def wis_schijfcache() -> int:
+    """Verwijdert alle bestanden uit de Arrow-cache; geeft het aantal terug."""
+    bestanden = list(CACHE_MAP.glob("*.arrow"))
+    for pad in bestanden:
+        pad.unlink(missing_ok=True)
+    return len(bestanden)
+
+
+def _bewaar(sleutel: tuple, df: pd.DataFrame) -> None:
+    global _cache_bytes
+    grootte = int(df.memory_usage(deep=True).sum())
+    max_bytes = MAX_CACHE_MB * 1024 * 1024
+    if grootte > max_bytes:
+        return  # groter dan de volledige cache: niet bewaren
+
+    with _cache_lock:
+        if sleutel in _cache:
+            _cache_bytes -= _cache.pop(sleutel)[1]
+        _cache[sleutel] = (df, grootte)
+        _cache_bytes += grootte
+        while _cache_bytes > max_bytes:
+            _, (_, oud) = _cache.popitem(last=False)
+            _cache_bytes -= oud
+
+
+def _uit_cache(sleutel: tuple) -> pd.DataFrame | None:
+    """Zoekt eerst in het geheugen en dan in de Arrow-cache op schijf."""
+    with _cache_lock:
+        gevonden = _cache.get(sleutel)
+        if gevonden is not None:
+            _cache.move_to_end(sleutel)
+    if gevonden is not None:
+        return gevonden[0]
+
+    df = _lees_van_schijf(sleutel)
+    if df is not None:
+        _bewaar(sleutel, df)
+    return df
+
+
+def lees_excel(bestand, schema: dict | None = None) -> pd.DataFrame:
+    """Leest een Excel-bestand in, met een cache op de inhoud van het
+    bestand. Met een schema worden enkel de verplichte en optionele kolommen
+    gelezen, met de opgegeven dtypes; zonder schema alle kolommen. Geeft
+    telkens een kopie terug, zodat aanpassingen door de app de cache niet
+    raken."""
+    inhoud = lees_bytes(bestand)
+    sleutel = _cache_sleutel(inhoud, schema)
+
+    df = _uit_cache(sleutel)
+    if df is None:
+        df = _parse(inhoud, schema)
+        _schrijf_naar_schijf(sleutel, df)
+        _bewaar(sleutel, df)
+    return df.copy()
+
+
+def lees_excel_bestanden(
+    bestanden: list, schema: dict | None = None, voortgang=None, max_workers: int | None = None
+) -> list[tuple]:
+    """Leest meerdere Excel-bestanden in en geeft per bestand (DataFrame,
+    None) of (None, fout) terug, in dezelfde volgorde als 'bestanden'.
+    Bestanden die nog niet in de cache zitten worden parallel in een
+    procespool geparsed (openpyxl gebruikt maar één kern per bestand).
+    'voortgang' wordt na elk bestand aangeroepen met (aantal klaar, totaal)."""
+    totaal = len(bestanden)
+    resultaten = [None] * totaal
+    te_parsen = {}  # index -> (inhoud, sleutel)
+    klaar = 0
+
+    for i, bestand in enumerate(bestanden):
+        try:
+            inhoud = lees_bytes(bestand)
+            sleutel = _cache_sleutel(inhoud, schema)
+            df = _uit_cache(sleutel)
+        except Exception as e:
+            resultaten[i] = (None, e)
+        else:
+            if df is None:
+                te_parsen[i] = (inhoud, sleutel)
+                continue
+            resultaten[i] = (df.copy(), None)
+        klaar += 1
+        if voortgang is not None:
+            voortgang(klaar, totaal)
+
+    def verwerk(i: int, df: pd.DataFrame) -> None:
+        sleutel = te_parsen[i][1]
+        _schrijf_naar_schijf(sleutel, df)
+        _bewaar(sleutel, df)
+        resultaten[i] = (df.copy(), None)
+
+    if len(te_parsen) == 1:
+        i, (inhoud, _) = next(iter(te_parsen.items()))
+        try:
+            verwerk(i, _parse(inhoud, schema))
+        except Exception as e:
+            resultaten[i] = (None, e)
+        if voortgang is not None:
+            voortgang(totaal, totaal)
+    elif te_parsen:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_PROCES_CONTEXT) as pool:
+            futures = {
+                pool.submit(_parse, inhoud, schema): i for i, (inhoud, _) in te_parsen.items()
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    verwerk(i, future.result())
+                except Exception as e:
+                    resultaten[i] = (None, e)
+                klaar += 1
+                if voortgang is not None:
+                    voortgang(klaar, totaal)
+
+    return resultaten
+
+
+def wis_cache() -> None:
+    """Maakt de cache leeg."""
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Beheer van de Arrow-cache van geüploade Excel-bestanden.")
+    parser.add_argument("--overzicht", action="store_true", help="toon de bestanden in de cache")
+    parser.add_argument("--wis", action="store_true", help="verwijder alle bestanden uit de cache")
+    args = parser.parse_args()
+
+    if args.wis:
+        print(f"{wis_schijfcache()} bestand(en) verwijderd uit {CACHE_MAP}")
+    else:
+        overzicht = schijfcache_overzicht()
+        print(f"{CACHE_MAP}: {len(overzicht)} bestand(en), {overzicht['Grootte (MB)'].sum():.2f} MB")
+        if not overzicht.empty:
+            print(overzicht.to_string(index=False))
@@ -0,0 +1,338 @@
+"""Gedeelde berekeningen voor de Klant × Maand-rapporten
+(Aantal_Omzet.py en Aantal_file_extra.py).
+
+Beide apps werken op een 'samenvatting' van de export in plaats van op de
+volledige DataFrame:
+
+    {
+        "rijen": aantal rijen na het weglaten van status 20,
+        "klanten": klantnamen in volgorde van eerste voorkomen,
+        "per_klant_maand": aantal files en omzet per (Klantnaam, JaarMaand),
+        "per_maand": aantal files per JaarMaand,
+        "nul_omzet": de rijen met 'Prest. Eigen Bedrijf' = 0 en een geldige
+                     Laaddatum, gesorteerd op Laaddatum (zie selecteer_periode),
+    }
+
+Zo'n samenvatting kan uit een ingelezen DataFrame gemaakt worden, of
+gestreamd, blok per blok, rechtstreeks uit het Excel-bestand. In dat
+laatste geval blijft het geheugengebruik begrensd, ongeacht de grootte van
+het bestand: enkel de aggregaten en de nul-omzet-rijen worden bijgehouden.
+
+Overlappende exports (bv. twee uploads met dezelfde weken) worden met een
+Ontdubbelaar gefilterd, zodat files en omzet niet dubbel geteld worden."""
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from inlezen import lees_bytes, schema_kolommen
+
+# Aantal Excel-rijen per blok bij gestreamd inlezen.
+BLOK_RIJEN = 50_000
+
+# Na zoveel blokken worden de tussentijdse aggregaten samengevoegd.
+SAMENVOEGEN_NA_BLOKKEN = 10
+
+# Kolommen die samen een file herkennen als er geen 'Dossiernr' is.
+SLEUTEL_KOLOMMEN = ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf']
+
+
+def verwerk_status(df: pd.DataFrame) -> pd.DataFrame:
+    """Laat rijen met 'Dossier Fin. Status' = 20 weg, zet 'Laaddatum' om
+    naar datetime en voegt de kolom 'JaarMaand' (maandperiode) toe."""
+    df_processed = df[df['Dossier Fin. Status'] != 20].copy()
+    df_processed['Laaddatum'] = pd.to_datetime(df_processed['Laaddatum'])
+    df_processed['JaarMaand'] = df_processed['Laaddatum'].dt.to_period('M')
+    return df_processed
+
+
+def dossier_sleutels(reeks: pd.Series) -> pd.Series:
+    """Dossiernummers als tekst, zodat 12345, 12345.0 en '12345' uit
+    verschillende exports als hetzelfde dossier herkend worden. Ontbrekende
+    nummers blijven leeg (en worden geen "nan" of "<NA>")."""
+    aanwezig = reeks.notna()
+    if pd.api.types.is_numeric_dtype(reeks):
+        geheel = reeks.dropna()
+        if (geheel == geheel.round()).all():
+            reeks = reeks.astype("Int64")
+    return reeks.astype("str").str.strip().where(aanwezig)
+
+
+class Ontdubbelaar:
+    """Laat files weg die al in een eerder toegevoegd bestand voorkwamen.
+
+    Elke rij krijgt een 64-bit hash van zijn 'Dossiernr', of van
+    'sleutel_kolommen' als het dossiernummer ontbreekt. De hashes van de
+    vorige bestanden worden in een hashtabel opgezocht (geen sortering), dus
+    de kost groeit lineair met het aantal rijen. Dubbels binnen eenzelfde
+    bestand blijven staan; bij overlap telt het eerst toegevoegde bestand.
+
+        ontdubbelaar = Ontdubbelaar()
+        for df in bestanden:             # of per blok van een bestand
+            df = ontdubbelaar.filter(df)
+            ...
+            weggelaten = ontdubbelaar.volgend_bestand()
+    """
+
+    def __init__(self, sleutel_kolommen: list = SLEUTEL_KOLOMMEN):
+        self.sleutel_kolommen = list(sleutel_kolommen)
+        self._gezien = pd.Index(np.empty(0, dtype=np.uint64))
+        self._huidig = []
+        self._weggelaten = 0
+
+    def _hashes(self, df: pd.DataFrame) -> np.ndarray:
+        kolommen = [kol for kol in self.sleutel_kolommen if kol in df.columns]
+        if 'Dossiernr' not in df.columns:
+            if not kolommen:
+                raise ValueError(
+                    f"Ontdubbelen vereist 'Dossiernr' of een van de kolommen: {', '.join(self.sleutel_kolommen)}"
+                )
+            return pd.util.hash_pandas_object(df[kolommen], index=False).to_numpy()
+
+        # Numerieke dossiernummers (ook als tekst) worden als geheel getal
+        # gehasht; enkel de overige worden (trager) als tekst gehasht.
+        dossiernr = df['Dossiernr']
+        getal = pd.to_numeric(dossiernr, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        geheel = np.isfinite(getal) & (getal == np.round(getal))
+        hashes = pd.util.hash_array(np.where(geheel, getal, 0).astype(np.int64))
+        tekst = ~geheel & dossiernr.notna().to_numpy()
+        if tekst.any():
+            hashes[tekst] = pd.util.hash_array(dossier_sleutels(dossiernr[tekst]).to_numpy(dtype=object))
+        zonder_nummer = ~geheel & ~tekst
+        if zonder_nummer.any() and kolommen:
+            reserve = pd.util.hash_pandas_object(df[kolommen], index=False).to_numpy()
+            hashes = np.where(zonder_nummer, reserve, hashes)
+        return hashes
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Geeft 'df' terug zonder de rijen die in een vorig bestand zaten."""
+        hashes = self._hashes(df)
+        dubbel = self._gezien.get_indexer(hashes) >= 0
+        self._huidig.append(hashes[~dubbel])
+        self._weggelaten += int(dubbel.sum())
+        return df[~dubbel] if dubbel.any() else df
+
+    def volgend_bestand(self, meetellen: bool = True) -> int:
+        """Sluit het huidige bestand af: zijn files tellen vanaf nu als
+        gezien (tenzij 'meetellen' False is, bv. als het bestand halverwege
+        niet verder gelezen kon worden). Geeft het aantal weggelaten dubbele
+        files terug."""
+        if self._huidig and meetellen:
+            self._gezien = pd.Index(pd.unique(np.concatenate([self._gezien.to_numpy(), *self._huidig])))
+        weggelaten = self._weggelaten
+        self._huidig = []
+        self._weggelaten = 0
+        return weggelaten
+
+
+def _aggregeer(df_processed: pd.DataFrame) -> pd.DataFrame:
+    return df_processed.groupby(['Klantnaam', 'JaarMaand'], observed=True)['Prest. Eigen Bedrijf'].agg(
+        aantal='size', omzet='sum'
+    )
+
+
+def _sorteer_nul_omzet(nul_omzet: pd.DataFrame) -> pd.DataFrame:
+    """Rijen zonder Laaddatum vallen buiten elke periode en worden
+    weggelaten; de rest wordt (stabiel) op Laaddatum gesorteerd."""
+    nul_omzet = nul_omzet[nul_omzet['Laaddatum'].notna()]
+    return nul_omzet.sort_values('Laaddatum', kind='stable', ignore_index=True)
+
+
+def selecteer_periode(df: pd.DataFrame, start: date, einde: date) -> pd.DataFrame:
+    """Rijen met een Laaddatum van 'start' t.e.m. 'einde', uit een op
+    Laaddatum gesorteerde DataFrame (zoals samenvatting["nul_omzet"]). De
+    grenzen worden binair gezocht, zonder elke datum om te zetten."""
+    laaddatum = df['Laaddatum']
+    begin = laaddatum.searchsorted(pd.Timestamp(start), side='left')
+    eind = laaddatum.searchsorted(pd.Timestamp(einde) + pd.Timedelta(days=1), side='left')
+    return df.iloc[begin:eind]
+
+
+def maak_samenvatting(df_processed: pd.DataFrame) -> dict:
+    """Samenvatting (zie bovenaan) van een reeds verwerkte DataFrame."""
+    return {
+        "rijen": len(df_processed),
+        "klanten": list(pd.unique(df_processed['Klantnaam'])),
+        "per_klant_maand": _aggregeer(df_processed),
+        "per_maand": df_processed['JaarMaand'].value_counts(),
+        "nul_omzet": _sorteer_nul_omzet(df_processed[df_processed['Prest. Eigen Bedrijf'] == 0]),
+    }
+
+
+def combineer_samenvattingen(samenvattingen: list) -> dict:
+    """Voegt de samenvattingen van meerdere bestanden samen, alsof de
+    bestanden eerst aan elkaar gehangen waren."""
+    if len(samenvattingen) == 1:
+        return samenvattingen[0]
+    return {
+        "rijen": sum(s["rijen"] for s in samenvattingen),
+        "klanten": list(pd.unique(pd.Series([k for s in samenvattingen for k in s["klanten"]], dtype=object))),
+        "per_klant_maand": pd.concat([s["per_klant_maand"] for s in samenvattingen])
+        .groupby(level=['Klantnaam', 'JaarMaand'])
+        .sum(),
+        "per_maand": pd.concat([s["per_maand"] for s in samenvattingen]).groupby(level=0).sum(),
+        "nul_omzet": _sorteer_nul_omzet(pd.concat([s["nul_omzet"] for s in samenvattingen], ignore_index=True)),
+    }
+
+
+def maak_pivots(samenvatting: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Klant × Maand-tabellen met het aantal files en de omzet (zelfde
+    vorm als pivot_table met fill_value=0)."""
+    per_klant_maand = samenvatting["per_klant_maand"]
+    pivot_aantal = per_klant_maand['aantal'].unstack('JaarMaand', fill_value=0)
+    pivot_omzet = per_klant_maand['omzet'].unstack('JaarMaand', fill_value=0)
+    return pivot_aantal, pivot_omzet
+
+
+def maak_kubus(samenvatting: dict) -> dict:
+    """Alles wat het Klant × Maand-rapport met filters nodig heeft, in één
+    keer berekend uit de samenvatting: aantal files en omzet per klant en
+    maand (dichte tabellen), het maximum per klant, de maanden, het totaal
+    per maand en de nul-omzet-rijen. Filters nemen hier enkel een deel uit,
+    zodat hun kost niet afhangt van het aantal rijen in de export."""
+    pivot_aantal, pivot_omzet = maak_pivots(samenvatting)
+    return {
+        "pivot_aantal": pivot_aantal,
+        "pivot_omzet": pivot_omzet,
+        "max_per_klant": pivot_aantal.max(axis=1),
+        "jaarmaanden": sorted(pivot_aantal.columns),
+        "per_maand": samenvatting["per_maand"].sort_index(),
+        "nul_omzet": samenvatting["nul_omzet"],
+    }
+
+
+def bouw_klant_maand_tabel(
+    pivot_aantal: pd.DataFrame,
+    pivot_omzet: pd.DataFrame,
+    klanten: list,
+    jaarmaanden: list,
+    max_per_klant: pd.Series | None = None,
+) -> pd.DataFrame:
+    """Brede tabel met één rij per klant (in de volgorde van 'klanten') en
+    per maand de kolommen 'JJJJ-MM A' (aantal files) en 'JJJJ-MM O'
+    (omzet). Met 'max_per_klant' komt er per maand ook 'JJJJ-MM P' bij: het
+    aantal files als percentage van het maximum van die klant. Klanten of
+    maanden zonder files krijgen 0."""
+    aantal = pivot_aantal.reindex(index=klanten, columns=jaarmaanden, fill_value=0).to_numpy()
+    omzet = pivot_omzet.reindex(index=klanten, columns=jaarmaanden, fill_value=0).to_numpy()
+    if max_per_klant is not None:
+        maxima = max_per_klant.reindex(klanten, fill_value=0).to_numpy()[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = np.where(maxima > 0, aantal / maxima * 100, 0)
+
+    kolommen = {'Klantnaam': klanten}
+    for i, jm in enumerate(jaarmaanden):
+        maand = jm.strftime('%Y-%m')
+        kolommen[f"{maand} A"] = aantal[:, i]
+        kolommen[f"{maand} O"] = omzet[:, i]
+        if max_per_klant is not None:
+            kolommen[f"{maand} P"] = percentage[:, i]
+    return pd.DataFrame(kolommen)
+
+
+def lees_in_blokken(bestand, kolommen: list, blok_rijen: int = BLOK_RIJEN):
+    """Leest het eerste werkblad van een .xlsx-bestand met openpyxl in
+    read_only-modus en levert DataFrames van hoogstens 'blok_rijen' rijen
+    op, met enkel de gevraagde kolommen die in het bestand voorkomen.
+    Volledig lege rijen worden overgeslagen; er wordt altijd minstens één
+    (eventueel leeg) blok opgeleverd als het werkblad een kopregel heeft."""
+    werkboek = openpyxl.load_workbook(BytesIO(lees_bytes(bestand)), read_only=True, data_only=True)
+    try:
+        rijen = werkboek.worksheets[0].iter_rows(values_only=True)
+        kop = next(rijen, None)
+        if kop is None:
+            return
+
+        posities = {}
+        for i, naam in enumerate(kop):
+            if naam in kolommen:
+                posities.setdefault(naam, i)
+        namen = list(posities)
+        indices = list(posities.values())
+
+        blok = []
+        geleverd = False
+        for rij in rijen:
+            waarden = [rij[i] if i < len(rij) else None for i in indices]
+            if all(w is None for w in waarden):
+                continue
+            blok.append(waarden)
+            if len(blok) >= blok_rijen:
+                yield pd.DataFrame(blok, columns=namen)
+                blok = []
+                geleverd = True
+        if blok or not geleverd:
+            yield pd.DataFrame(blok, columns=namen)
+    finally:
+        werkboek.close()
+
+
+def _pas_dtypes_toe(blok: pd.DataFrame, dtype: dict) -> pd.DataFrame:
+    """Zelfde dtypes als bij het gewone inlezen (zie inlezen.py); bij 'str'
+    blijven lege cellen leeg."""
+    for kol, soort in dtype.items():
+        if kol not in blok.columns:
+            continue
+        if soort is str:
+            waarden = blok[kol].astype(object)
+            blok[kol] = waarden.where(waarden.isna(), waarden.map(str))
+        else:
+            blok[kol] = blok[kol].astype(soort)
+    return blok
+
+
+def lees_samenvatting_gestreamd(
+    bestand, schema: dict, blok_rijen: int = BLOK_RIJEN, ontdubbelaar: Ontdubbelaar | None = None
+) -> dict:
+    """Bouwt de samenvatting blok per blok op, zonder ooit het volledige
+    bestand als DataFrame in het geheugen te hebben. Met een ontdubbelaar
+    worden files uit eerdere bestanden weggelaten (de aanroeper sluit het
+    bestand daarna af met volgend_bestand()). Gooit een ValueError als
+    verplichte kolommen ontbreken."""
+    klanten = {}
+    delen = []
+    per_klant_maand = None
+    per_maand = None
+    nul_omzet = []
+    rijen = 0
+
+    for nummer, blok in enumerate(lees_in_blokken(bestand, schema_kolommen(schema), blok_rijen)):
+        if nummer == 0:
+            ontbrekend = [kol for kol in schema["verplicht"] if kol not in blok.columns]
+            if ontbrekend:
+                raise ValueError(
+                    f"Het Excel-bestand moet de volgende kolommen bevatten: {', '.join(ontbrekend)}"
+                )
+
+        blok = _pas_dtypes_toe(blok, schema.get("dtype", {}))
+        if ontdubbelaar is not None:
+            blok = ontdubbelaar.filter(blok)
+        blok = verwerk_status(blok)
+        rijen += len(blok)
+        # None staat voor een lege klantnaam (NaN is niet bruikbaar als sleutel)
+        klanten.update(dict.fromkeys(None if pd.isna(k) else k for k in pd.unique(blok['Klantnaam'])))
+        delen.append(_aggregeer(blok))
+        telling = blok['JaarMaand'].value_counts()
+        per_maand = telling if per_maand is None else pd.concat([per_maand, telling]).groupby(level=0).sum()
+        nul_omzet.append(blok[blok['Prest. Eigen Bedrijf'] == 0])
+
+        if len(delen) >= SAMENVOEGEN_NA_BLOKKEN:
+            if per_klant_maand is not None:
+                delen.insert(0, per_klant_maand)
+            per_klant_maand = pd.concat(delen).groupby(level=['Klantnaam', 'JaarMaand']).sum()
+            delen = []
+
+    if per_maand is None:
+        raise ValueError("Het Excel-bestand bevat geen kopregel of gegevens.")
+    if per_klant_maand is not None:
+        delen.insert(0, per_klant_maand)
+
+    return {
+        "rijen": rijen,
+        "klanten": [float("nan") if k is None else k for k in klanten],
+        "per_klant_maand": pd.concat(delen).groupby(level=['Klantnaam', 'JaarMaand']).sum(),
+        "per_maand": per_maand,
+        "nul_omzet": _sorteer_nul_omzet(pd.concat(nul_omzet, ignore_index=True)),
+    }
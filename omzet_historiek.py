@@ -0,0 +1,247 @@
+"""Lokale historiek van de omzet-exports voor Aantal_file_extra.py.
+
+In plaats van telkens alle vorige maanden opnieuw te uploaden, worden de
+geüploade exports bewaard als Parquet-bestanden, één per maand (op basis
+van 'Laaddatum'):
+
+    omzet_historiek/
+        JaarMaand=2024-01.parquet
+        JaarMaand=2024-02.parquet
+        JaarMaand=onbekend.parquet      # rijen zonder geldige Laaddatum
+        sleutels.parquet                # index: Sleutel -> maand
+
+Een nieuwe export wordt toegevoegd met voeg_toe(): enkel de maanden die
+erin voorkomen (of die een dossier bevatten dat opnieuw werd aangeleverd)
+worden herschreven. Een dossier dat al bewaard was, wordt vervangen door
+de nieuwe versie, ook als het ondertussen naar een andere maand verschoof.
+Welke maanden een dossier al bevatten, staat in een kleine index
+(sleutels.parquet), zodat een upload niet elke maand hoeft te lezen. Is
+een van de maandbestanden recenter gewijzigd dan de index (of ontbreekt
+de index), dan wordt hij opnieuw opgebouwd.
+Rijen zonder 'Dossiernr' (of een export zonder die kolom) worden herkend
+aan Klantnaam, Laaddatum en omzet (SLEUTEL_KOLOMMEN), zodat dezelfde
+export opnieuw uploaden (ook in een andere sessie of na een herstart)
+niets dubbel telt.
+
+Het rapport wordt opgebouwd uit een samenvatting per maand (zie
+omzet_analyse.py). Die wordt in het geheugen bijgehouden zolang het
+bestand niet wijzigt, zodat na een upload enkel de gewijzigde maanden
+opnieuw berekend worden. Vereist pyarrow."""
+import importlib.util
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from omzet_analyse import (
+    SLEUTEL_KOLOMMEN,
+    combineer_samenvattingen,
+    dossier_sleutels,
+    maak_samenvatting,
+    verwerk_status,
+)
+
+# Map met de bewaarde maanden.
+HISTORIEK_MAP = Path(os.environ.get("OMZET_HISTORIEK", Path(__file__).with_name("omzet_historiek")))
+
+ONBEKEND = "onbekend"
+
+# Kolommen die bewaard worden; 'Sleutel' identificeert de file (zie _sleutels)
+KOLOMMEN = ['Klantnaam', 'Laaddatum', 'Prest. Eigen Bedrijf', 'Dossier Fin. Status', 'Dossiernr']
+
+# bestandsnaam -> ((mtime, grootte), samenvatting)
+_samenvattingen = {}
+_lock = threading.Lock()
+# Eén upload tegelijk schrijft naar de historiek (sessies zijn threads)
+_schrijf_lock = threading.Lock()
+
+
+def beschikbaar() -> bool:
+    """De historiek wordt als Parquet bewaard en heeft dus pyarrow nodig."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _pad(partitie: str) -> Path:
+    return HISTORIEK_MAP / f"JaarMaand={partitie}.parquet"
+
+
+def _index_pad() -> Path:
+    return HISTORIEK_MAP / "sleutels.parquet"
+
+
+def _partities() -> list[Path]:
+    """Alle bewaarde maanden, chronologisch; 'onbekend' achteraan."""
+    return sorted(
+        HISTORIEK_MAP.glob("JaarMaand=*.parquet"),
+        key=lambda p: (p.stem.endswith(ONBEKEND), p.stem),
+    )
+
+
+def _normaliseer(df: pd.DataFrame) -> pd.DataFrame:
+    """Vaste types, zodat alle maanden hetzelfde Parquet-schema hebben."""
+    df = df.copy()
+    # Lege cellen blijven leeg (pandas < 3 maakt er met astype anders "nan" van)
+    df['Klantnaam'] = df['Klantnaam'].astype("str").where(df['Klantnaam'].notna())
+    df['Laaddatum'] = pd.to_datetime(df['Laaddatum'], errors='coerce')
+    df['Prest. Eigen Bedrijf'] = pd.to_numeric(df['Prest. Eigen Bedrijf'], errors='coerce')
+    df['Dossier Fin. Status'] = pd.to_numeric(df['Dossier Fin. Status'], errors='coerce')
+    df['Dossiernr'] = dossier_sleutels(df['Dossiernr'])
+    return df
+
+
+def _sleutels(df: pd.DataFrame) -> pd.Series:
+    """Sleutel per rij van een genormaliseerde export: het dossiernummer,
+    of zonder nummer een hash van SLEUTEL_KOLOMMEN met een volgnummer. Door
+    dat volgnummer blijven twee gelijke regels in één export allebei
+    bestaan, maar vervangt dezelfde export ze bij een volgende upload."""
+    sleutel = df['Dossiernr'].astype(object)
+    zonder_nummer = sleutel.isna()
+    if zonder_nummer.any():
+        reserve = pd.Series(
+            pd.util.hash_pandas_object(df.loc[zonder_nummer, SLEUTEL_KOLOMMEN], index=False).to_numpy(),
+            index=sleutel.index[zonder_nummer],
+        ).astype(str)
+        volgnummer = reserve.groupby(reserve).cumcount().astype(str)
+        sleutel[zonder_nummer] = "~" + reserve + "#" + volgnummer
+    return sleutel.astype(str)
+
+
+def _schrijf(partitie: str, df: pd.DataFrame) -> None:
+    pad = _pad(partitie)
+    if df.empty:
+        pad.unlink(missing_ok=True)
+        return
+    tijdelijk = pad.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        df.to_parquet(tijdelijk, index=False)
+        os.replace(tijdelijk, pad)
+    finally:
+        tijdelijk.unlink(missing_ok=True)
+
+
+def _lees_index(partities: list[Path]) -> pd.DataFrame:
+    """Sleutel -> Partitie van alle bewaarde files. Wordt opnieuw opgebouwd
+    uit de maanden als de index ontbreekt of een maand nieuwer is (bv. na
+    een onderbroken upload)."""
+    index_pad = _index_pad()
+    try:
+        index_tijd = index_pad.stat().st_mtime_ns
+    except FileNotFoundError:
+        index_tijd = None
+    if index_tijd is not None and all(pad.stat().st_mtime_ns <= index_tijd for pad in partities):
+        return pd.read_parquet(index_pad)
+
+    delen = []
+    for pad in partities:
+        bestaand = pd.read_parquet(pad)
+        sleutel = bestaand['Sleutel'] if 'Sleutel' in bestaand.columns else _sleutels(bestaand)
+        delen.append(pd.DataFrame({'Sleutel': sleutel.astype(str), 'Partitie': pad.stem.split("=", 1)[1]}))
+    return pd.concat(delen, ignore_index=True) if delen else pd.DataFrame(
+        {'Sleutel': pd.Series(dtype=str), 'Partitie': pd.Series(dtype=str)}
+    )
+
+
+def _schrijf_index(index: pd.DataFrame) -> None:
+    index_pad = _index_pad()
+    tijdelijk = index_pad.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        index.to_parquet(tijdelijk, index=False)
+        os.replace(tijdelijk, index_pad)
+    finally:
+        tijdelijk.unlink(missing_ok=True)
+
+
+def voeg_toe(df: pd.DataFrame) -> dict:
+    """Voegt een ingelezen export toe aan de historiek. Files die al
+    bewaard waren (zelfde 'Dossiernr', of zonder nummer dezelfde klant,
+    laaddatum en omzet) worden vervangen. Geeft het aantal nieuwe en
+    vervangen files terug."""
+    ontbrekend = [kol for kol in KOLOMMEN if kol != 'Dossiernr' and kol not in df.columns]
+    if ontbrekend:
+        raise ValueError(
+            f"Voor de historiek moet de export de volgende kolommen bevatten: {', '.join(ontbrekend)}"
+        )
+
+    # Zonder 'Dossiernr' krijgt elke rij de reservesleutel (zie _sleutels)
+    df = _normaliseer(df.reindex(columns=KOLOMMEN))
+    df['Sleutel'] = _sleutels(df)
+    # Binnen dezelfde export telt de laatste regel van een dossier.
+    df = df[~df['Sleutel'].duplicated(keep='last')]
+    partitie_per_rij = df['Laaddatum'].dt.strftime('%Y-%m').fillna(ONBEKEND)
+    sleutels = set(df['Sleutel'])
+
+    HISTORIEK_MAP.mkdir(parents=True, exist_ok=True)
+    with _schrijf_lock:
+        index = _lees_index(_partities())
+        dubbel = index['Sleutel'].isin(sleutels)
+        vervangen = int(dubbel.sum())
+        # Enkel de maanden van de upload en die met een vervangen dossier
+        for partitie in set(partitie_per_rij) | set(index.loc[dubbel, 'Partitie']):
+            nieuw = df[partitie_per_rij == partitie]
+            pad = _pad(partitie)
+            if pad.exists():
+                bestaand = pd.read_parquet(pad)
+                if 'Sleutel' not in bestaand.columns:  # bewaard voor er sleutels waren
+                    bestaand['Sleutel'] = _sleutels(bestaand)
+                nieuw = pd.concat([bestaand[~bestaand['Sleutel'].isin(sleutels)], nieuw], ignore_index=True)
+            _schrijf(partitie, nieuw.reset_index(drop=True))
+
+        # Index als laatste, zodat hij nooit ouder lijkt dan de maanden
+        _schrijf_index(pd.concat(
+            [index[~dubbel], pd.DataFrame({'Sleutel': df['Sleutel'], 'Partitie': partitie_per_rij})],
+            ignore_index=True,
+        ))
+
+    return {"nieuw": len(df) - vervangen, "vervangen": vervangen}
+
+
+def _samenvatting(pad: Path) -> dict:
+    status = pad.stat()
+    versie = (status.st_mtime_ns, status.st_size)
+    with _lock:
+        gevonden = _samenvattingen.get(pad.name)
+    if gevonden is not None and gevonden[0] == versie:
+        return gevonden[1]
+
+    samenvatting = maak_samenvatting(verwerk_status(pd.read_parquet(pad, columns=KOLOMMEN)))
+    with _lock:
+        _samenvattingen[pad.name] = (versie, samenvatting)
+    return samenvatting
+
+
+def historiek_versie() -> tuple:
+    """Verandert telkens een maand bewaard, vervangen of gewist wordt."""
+    return tuple((pad.name, pad.stat().st_mtime_ns, pad.stat().st_size) for pad in _partities())
+
+
+def lees_samenvatting() -> dict | None:
+    """Samenvatting (zie omzet_analyse.py) van de volledige historiek, of
+    None als er nog niets bewaard is."""
+    samenvattingen = [_samenvatting(pad) for pad in _partities()]
+    if not samenvattingen:
+        return None
+    return combineer_samenvattingen(samenvattingen)
+
+
+def historiek_overzicht() -> pd.DataFrame:
+    """Aantal bewaarde files per maand (zonder status 20)."""
+    return pd.DataFrame(
+        [
+            {"Maand": pad.stem.split("=", 1)[1], "Aantal Files (excl. status 20)": _samenvatting(pad)["rijen"]}
+            for pad in _partities()
+        ],
+        columns=["Maand", "Aantal Files (excl. status 20)"],
+    )
+
+
+def wis_historiek() -> int:
+    """Verwijdert alle bewaarde maanden; geeft het aantal terug."""
+    with _schrijf_lock:
+        bestanden = _partities()
+        for pad in bestanden:
+            pad.unlink(missing_ok=True)
+        _index_pad().unlink(missing_ok=True)
+    with _lock:
+        _samenvattingen.clear()
+    return len(bestanden)
@@ -0,0 +1,289 @@
+"""Opbouw van de overzichtsmails per opdrachtgever (tabel, HTML en .eml).
+
+Deze functies staan los van de Streamlit-app ClientOrders.py zodat ze ook
+in aparte processen (bulk-export) gebruikt kunnen worden."""
+import multiprocessing
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from html import escape
+from io import BytesIO
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+# Onder dit aantal mails is het opstarten van extra processen trager dan
+# de mails gewoon na elkaar op te bouwen.
+MIN_MAILS_VOOR_PROCESPOOL = 8
+
+# Streamlit draait met meerdere threads; een fork van zo'n proces kan een
+# lock erven die nooit meer vrijkomt. De werkers starten daarom vanuit een
+# schone forkserver (of met spawn waar die niet bestaat, bv. Windows).
+_PROCES_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def normaliseer_emails(email_veld: str) -> str:
+    """Zet een e-mailveld met meerdere adressen (gescheiden door ';' of ',')
+    om naar een correct geformatteerde, komma-gescheiden lijst voor de
+    'To'-header van de mail."""
+    if not email_veld:
+        return ""
+    onderdelen = re.split(r"[;,]", str(email_veld))
+    onderdelen = [e.strip() for e in onderdelen if e.strip()]
+    return ", ".join(onderdelen)
+
+
+def verdeel_per_opdrachtgever(df: pd.DataFrame) -> dict:
+    """Bouwt in één groupby-pass een index op van Opdrachtgever-code ->
+    rijposities, zodat niet elke opdrachtgever het volledige bestand
+    opnieuw moet doorzoeken. Lege codes (NaN) worden overgeslagen."""
+    return df.groupby("Opdrachtgever", sort=False, dropna=True).indices
+
+
+def onbekende_opdrachtgevers(partities: dict, gekende_codes) -> pd.DataFrame:
+    """Geeft de codes uit het bestand terug die niet in de opdrachtgeverslijst
+    staan, met het aantal zendingen per code (meeste zendingen eerst)."""
+    gekend = set(gekende_codes)
+    rijen = [
+        {"Code": code, "Zendingen": len(posities)}
+        for code, posities in partities.items()
+        if code not in gekend
+    ]
+    if not rijen:
+        return pd.DataFrame(columns=["Code", "Zendingen"])
+    return pd.DataFrame(rijen).sort_values("Zendingen", ascending=False, kind="stable")
+
+
+NAV_LINK_PREFIX = (
+    "navision://client/run?servername=server05%26database=NAVITRANS%26company=TUF"
+    "%26target=Form%202028368%26view=SORTING(Field300,Field3)%26servertype=MSSQL%26position="
+)
+
+
+def bouw_nav_link(nav_waarde) -> str | None:
+    """Bouwt de Navision-link op basis van de waarde in de 'NAV'-kolom."""
+    if pd.isna(nav_waarde) or str(nav_waarde).strip() == "":
+        return None
+    return NAV_LINK_PREFIX + quote(str(nav_waarde).strip(), safe="")
+
+
+def bouw_nav_links(nav_kolom: pd.Series) -> pd.Series:
+    """Kolomversie van bouw_nav_link: zelfde resultaat, maar zonder een
+    Python-aanroep per rij. Enkel waarden met tekens buiten [A-Za-z0-9_.~-]
+    moeten URL-gecodeerd worden, en dat gebeurt één keer per unieke waarde."""
+    tekst = nav_kolom.astype(object).where(nav_kolom.notna(), "").astype(str).str.strip()
+    leeg = tekst == ""
+
+    te_coderen = ~leeg & ~tekst.str.fullmatch(r"[A-Za-z0-9_.~-]*")
+    if te_coderen.any():
+        gecodeerd = {w: quote(w, safe="") for w in pd.unique(tekst[te_coderen])}
+        tekst = tekst.where(~te_coderen, tekst.map(gecodeerd))
+
+    links = (NAV_LINK_PREFIX + tekst).astype(object)
+    return links.where(~leeg, None)
+
+
+def bereken_afzender(row) -> str:
+    """Bepaalt de weergave van de 'Afzender'-kolom op basis van 'Type':
+    - Type = 'Laden'    -> '-> Afzender'
+    - Type = 'levering' -> '<- Afzender'
+    - andere waarden    -> leeg
+    (niet hoofdlettergevoelig, spaties worden genegeerd)
+    """
+    type_waarde = str(row.get("Type", "")).strip().lower()
+    afzender = row.get("Afzender", "")
+    afzender = "" if pd.isna(afzender) else str(afzender).strip()
+
+    if type_waarde == "laden":
+        return f"-> {afzender}"
+    elif type_waarde == "levering":
+        return f"<- {afzender}"
+    else:
+        return ""
+
+
+def bereken_afzender_kolom(subset: pd.DataFrame) -> pd.Series:
+    """Kolomversie van bereken_afzender voor alle rijen tegelijk, met
+    dezelfde regels (Type niet hoofdlettergevoelig, spaties genegeerd,
+    lege Afzender -> enkel de pijl)."""
+    type_waarde = subset["Type"].astype(str).str.strip().str.lower()
+    afzender = subset["Afzender"]
+    afzender = afzender.astype(object).where(afzender.notna(), "").astype(str).str.strip()
+
+    resultaat = np.select(
+        [type_waarde == "laden", type_waarde == "levering"],
+        ["-> " + afzender, "<- " + afzender],
+        default="",
+    )
+    return pd.Series(resultaat, index=subset.index, dtype=object)
+
+
+def bouw_overzicht(subset: pd.DataFrame) -> pd.DataFrame:
+    """Bouwt het overzicht op met de basiskolommen, aangevuld met de
+    optionele kolommen 'Klantnaam' (-> 'Naam'), 'LaadLosRef' en
+    'Afzender' (berekend), telkens enkel als ze in het bestand aanwezig zijn.
+    Verwacht dat 'subset' al gesorteerd is (zie sorteer_op_type)."""
+    overzicht = pd.DataFrame(index=subset.index)
+
+    overzicht["Verzending-ID"] = subset["Verzending-ID"]
+    overzicht["Type"] = subset["Type"]
+    overzicht["PC"] = subset["PC"]
+    overzicht["Plaatsnaam"] = subset["Plaatsnaam"]
+
+    if "Klantnaam" in subset.columns:
+        overzicht["Naam"] = subset["Klantnaam"]
+
+    overzicht["Kg"] = subset["Kg"]
+    overzicht["LM"] = subset["LM"]
+    overzicht["Aantal"] = subset["Aantal"]
+    overzicht["Goederen"] = subset["Goederen"]
+    overzicht["ETA"] = subset["ETA"]
+
+    if "LaadLosRef" in subset.columns:
+        overzicht["LaadLosRef"] = subset["LaadLosRef"]
+
+    if "Afzender" in subset.columns:
+        overzicht["Afzender"] = bereken_afzender_kolom(subset)
+
+    return overzicht.reset_index(drop=True)
+
+
+def sorteer_op_type(subset: pd.DataFrame) -> pd.DataFrame:
+    """Sorteert de rijen op 'Type', met behoud van de onderlinge volgorde."""
+    return subset.sort_values(by="Type", kind="stable").reset_index(drop=True)
+
+
+def _kolom_als_html(reeks: pd.Series) -> pd.Series:
+    """Zet een volledige kolom in één keer om naar HTML-veilige celtekst:
+    lege waarden (NaN) worden een lege cel, en &, < en > worden ge-escaped.
+    Ook de pijlen in Afzender ("-> X", "<- X") komen zo als "-&gt; X" in
+    de HTML; in de mail ziet dat er hetzelfde uit."""
+    tekst = reeks.astype(object).where(reeks.notna(), "").map(str)
+    return (
+        tekst.str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+    )
+
+
+def bouw_html_tabel(overzicht: pd.DataFrame) -> str:
+    """Bouwt een mooi opgemaakte, uitgelijnde HTML-tabel voor in de mail.
+    De cellen worden kolom per kolom opgebouwd (geen iterrows), de stijl
+    blijft inline omdat Outlook <style>-klassen niet betrouwbaar toepast."""
+    kolom_stijl = (
+        "border:1px solid #cccccc; padding:6px 10px; "
+        "font-family:Calibri,Arial,sans-serif; font-size:11pt;"
+    )
+    header_stijl = kolom_stijl + " background-color:#1F4E78; color:#ffffff; text-align:left;"
+
+    html = ['<table style="border-collapse:collapse; width:100%;">', "<tr>"]
+    for kol in overzicht.columns:
+        html.append(f'<th style="{header_stijl}">{escape(str(kol), quote=False)}</th>')
+    html.append("</tr>")
+
+    # Per kolom één omzetting; daarna wordt elke rij met één join opgebouwd
+    cellen = [_kolom_als_html(overzicht[kol]).tolist() for kol in overzicht.columns]
+    rij_kleuren = ("#ffffff", "#F2F2F2")
+    td_open = [f'<td style="{kolom_stijl} background-color:{kleur};">' for kleur in rij_kleuren]
+    td_tussen = ["</td>" + td for td in td_open]
+
+    for i, rij in enumerate(zip(*cellen)):
+        html.append("<tr>" + td_open[i % 2] + td_tussen[i % 2].join(rij) + "</td></tr>")
+
+    html.append("</table>")
+    return "".join(html)
+
+
+def bouw_eml(to_email: str, subject: str, html_body: str) -> bytes:
+    """Bouwt een .eml-bestand dat Outlook als bewerkbare, klaarstaande
+    mail opent (X-Unsent: 1 zorgt dat het als concept opent i.p.v.
+    als gelezen bericht). 'to_email' mag meerdere, komma-gescheiden
+    adressen bevatten."""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["To"] = to_email
+    msg["X-Unsent"] = "1"
+
+    plain_fallback = (
+        "Deze mail bevat een overzicht in tabelvorm. "
+        "Open dit bestand in Outlook om de opgemaakte versie te zien."
+    )
+    msg.attach(MIMEText(plain_fallback, "plain"))
+    msg.attach(MIMEText(html_body, "html"))
+
+    return msg.as_bytes()
+
+
+def bouw_mail_html(naam: str, tabel_html: str) -> str:
+    """Zet de overzichtstabel in de vaste mailtekst voor een opdrachtgever."""
+    return f"""
+        <html>
+        <body style="font-family:Calibri,Arial,sans-serif; font-size:11pt;">
+            <p>Beste,</p>
+            <p>Hieronder vindt u het overzicht van de uit te voeren zendingen voor <b>{naam}</b>:</p>
+            {tabel_html}
+            <p>Met vriendelijke groeten,</p>
+        </body>
+        </html>
+        """
+
+
+def bouw_mail_onderwerp(naam: str) -> str:
+    """Onderwerpregel van de overzichtsmail."""
+    return f"Overzicht uit te voeren zendingen - {naam}"
+
+
+def eml_bestandsnaam(naam: str, code: str) -> str:
+    """Bestandsnaam van de .eml; schuine strepen in de naam worden vervangen
+    zodat de naam ook binnen een ZIP geen submap wordt."""
+    return f"Overzicht_{naam}_{code}.eml".replace("/", "_").replace("\\", "_")
+
+
+def bouw_mail_bestand(code: str, naam: str, email: str, subset: pd.DataFrame) -> tuple[str, bytes]:
+    """Volledige keten voor één opdrachtgever: bouw_overzicht ->
+    bouw_html_tabel -> bouw_eml. Verwacht een gesorteerde subset (zie
+    sorteer_op_type) en geeft (bestandsnaam, eml-bytes) terug."""
+    overzicht = bouw_overzicht(subset)
+    mail_html = bouw_mail_html(naam, bouw_html_tabel(overzicht))
+    eml_bytes = bouw_eml(email, bouw_mail_onderwerp(naam), mail_html)
+    return eml_bestandsnaam(naam, code), eml_bytes
+
+
+def bouw_mails(taken: list, voortgang=None, max_workers: int | None = None):
+    """Bouwt de .eml-bestanden voor alle taken (code, naam, email, subset)
+    en levert (index van de taak, bestandsnaam, eml-bytes) op zodra een mail
+    klaar is. Vanaf MIN_MAILS_VOOR_PROCESPOOL gebeurt dit parallel in een
+    procespool. 'voortgang' wordt na elke mail aangeroepen met
+    (aantal klaar, totaal)."""
+    totaal = len(taken)
+
+    if totaal < MIN_MAILS_VOOR_PROCESPOOL:
+        for klaar, taak in enumerate(taken, start=1):
+            bestandsnaam, eml_bytes = bouw_mail_bestand(*taak)
+            if voortgang is not None:
+                voortgang(klaar, totaal)
+            yield klaar - 1, bestandsnaam, eml_bytes
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=_PROCES_CONTEXT) as pool:
+        futures = {pool.submit(bouw_mail_bestand, *taak): i for i, taak in enumerate(taken)}
+        for klaar, future in enumerate(as_completed(futures), start=1):
+            bestandsnaam, eml_bytes = future.result()
+            if voortgang is not None:
+                voortgang(klaar, totaal)
+            yield futures[future], bestandsnaam, eml_bytes
+
+
+def exporteer_mails_zip(taken: list, voortgang=None, max_workers: int | None = None) -> bytes:
+    """Bouwt de .eml-bestanden voor alle taken (zie bouw_mails) en schrijft
+    ze, telkens zodra er één klaar is, in één ZIP-bestand."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for _, bestandsnaam, eml_bytes in bouw_mails(taken, voortgang, max_workers):
+            zf.writestr(bestandsnaam, eml_bytes)
+    return buffer.getvalue()
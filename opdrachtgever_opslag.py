@@ -0,0 +1,131 @@
+"""Blijvende opslag van de opdrachtgever-mailadressen (Code -> Klantnaam /
+E-mail) in een lokale SQLite-database.
+
+De database wordt gedeeld door alle sessies van hetzelfde serverproces en
+overleeft een herstart van de app. Elke wijziging verhoogt een
+versienummer, zodat de app de samengevoegde lijst enkel opnieuw hoeft op
+te bouwen als er effectief iets veranderd is."""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Pad naar de database; kan overschreven worden via de omgevingsvariabele.
+DB_PAD = Path(
+    os.environ.get("OPDRACHTGEVER_DB", Path(__file__).with_name("opdrachtgevers.sqlite"))
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS opdrachtgevers (
+    code  TEXT PRIMARY KEY,
+    naam  TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    sleutel TEXT PRIMARY KEY,
+    waarde  INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (sleutel, waarde) VALUES ('versie', 0);
+"""
+
+# Databases waarvoor het schema in dit proces al aangemaakt is. Het schema
+# (en de WAL-modus) schrijven vraagt een schrijflock; dat gebeurt dus één
+# keer per proces en niet bij elke rerun, zodat lezen nooit moet wachten
+# op een andere sessie die aan het bewaren is.
+_aangemaakt = set()
+_schema_lock = threading.Lock()
+
+
+def normaliseer_opdrachtgever(x):
+    """Zet Opdrachtgever om naar een schone string, ook als het een
+    numerieke waarde is (voorkomt bv. '123.0' i.p.v. '123')."""
+    if pd.isna(x):
+        return x
+    if isinstance(x, float) and x.is_integer():
+        return str(int(x))
+    return str(x).strip()
+
+
+def normaliseer_opdrachtgever_kolom(reeks: pd.Series) -> pd.Series:
+    """Kolomversie van normaliseer_opdrachtgever. Numerieke kolommen (zoals
+    'Opdrachtgever' uit Excel) worden in één keer omgezet; enkel gemengde
+    tekstkolommen vallen terug op de omzetting per waarde."""
+    if isinstance(reeks.dtype, pd.CategoricalDtype):
+        # Eén omzetting per categorie i.p.v. per rij
+        categorieen = normaliseer_opdrachtgever_kolom(pd.Series(reeks.cat.categories)).to_numpy(dtype=object)
+        codes = reeks.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, categorieen[codes], np.nan), index=reeks.index, dtype=object)
+    if pd.api.types.is_integer_dtype(reeks):
+        return reeks.astype(str).astype(object)
+    if pd.api.types.is_float_dtype(reeks):
+        geheel = reeks.notna() & (reeks % 1 == 0)
+        tekst = reeks.astype(object).where(reeks.notna())
+        tekst[geheel] = reeks[geheel].astype("int64").astype(str)
+        tekst[~geheel & reeks.notna()] = reeks[~geheel & reeks.notna()].astype(str)
+        return tekst
+    return reeks.map(normaliseer_opdrachtgever).astype(object)
+
+
+def _verbind(db_pad: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_pad, timeout=10)
+    sleutel = Path(db_pad).resolve()
+    if sleutel not in _aangemaakt:
+        with _schema_lock:
+            if sleutel not in _aangemaakt:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                _aangemaakt.add(sleutel)
+    return conn
+
+
+def lees_versie(db_pad: Path = DB_PAD) -> int:
+    """Versienummer van de opgeslagen lijst; verhoogt bij elke wijziging."""
+    with closing(_verbind(db_pad)) as conn:
+        return conn.execute("SELECT waarde FROM meta WHERE sleutel = 'versie'").fetchone()[0]
+
+
+def lees_overrides(db_pad: Path = DB_PAD) -> dict:
+    """Alle opgeslagen opdrachtgevers als {code: {"naam", "email"}}."""
+    with closing(_verbind(db_pad)) as conn:
+        rijen = conn.execute("SELECT code, naam, email FROM opdrachtgevers").fetchall()
+    return {code: {"naam": naam, "email": email} for code, naam, email in rijen}
+
+
+def maak_overrides(df_mail: pd.DataFrame, kol_code: str, kol_naam: str, kol_email: str) -> pd.DataFrame:
+    """Zet een ingelezen maillijst in één keer om naar de kolommen code /
+    naam / email. Rijen zonder code worden weggelaten; bij dubbele codes
+    wint de laatste rij."""
+    overrides = pd.DataFrame(
+        {
+            "code": normaliseer_opdrachtgever_kolom(df_mail[kol_code]),
+            "naam": df_mail[kol_naam].astype(object).fillna("").astype(str).str.strip(),
+            "email": df_mail[kol_email].astype(object).fillna("").astype(str).str.strip(),
+        }
+    )
+    overrides = overrides[overrides["code"].notna() & (overrides["code"] != "")]
+    return overrides.drop_duplicates(subset="code", keep="last")
+
+
+def bewaar_overrides(overrides: pd.DataFrame, db_pad: Path = DB_PAD) -> int:
+    """Schrijft alle rijen (code, naam, email) in één transactie weg als
+    bulk-upsert en verhoogt de versie. Geeft het aantal rijen terug."""
+    rijen = list(overrides[["code", "naam", "email"]].itertuples(index=False, name=None))
+    with closing(_verbind(db_pad)) as conn, conn:
+        conn.executemany(
+            "INSERT INTO opdrachtgevers (code, naam, email) VALUES (?, ?, ?) "
+            "ON CONFLICT(code) DO UPDATE SET naam = excluded.naam, email = excluded.email",
+            rijen,
+        )
+        conn.execute("UPDATE meta SET waarde = waarde + 1 WHERE sleutel = 'versie'")
+    return len(rijen)
+
+
+def wis_overrides(db_pad: Path = DB_PAD) -> None:
+    """Verwijdert alle opgeslagen opdrachtgevers (de hardcoded lijst blijft)."""
+    with closing(_verbind(db_pad)) as conn, conn:
+        conn.execute("DELETE FROM opdrachtgevers")
+        conn.execute("UPDATE meta SET waarde = waarde + 1 WHERE sleutel = 'versie'")
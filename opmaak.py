@@ -0,0 +1,32 @@
+"""Gedeelde weergave van getallen in de rapporten.
+
+Tabellen blijven numeriek (sorteerbaar in de grid, compact in het
+geheugen); euro's, percentages en laadmeters worden pas bij het tonen
+opgemaakt, door st.dataframe zelf via column_config. Losse waarden (bv. in
+st.metric) worden met formatteer() in hetzelfde formaat gezet.
+
+    st.dataframe(df, column_config=kolomopmaak({"Omzet": "euro"}))
+    st.metric("Totale omzet", formatteer(totaal, "euro"))"""
+import streamlit as st
+
+# naam -> (printf-formaat voor de grid, Python-formaat voor losse waarden)
+FORMATEN = {
+    "euro": ("€%,.2f", "€{:,.2f}"),
+    "procent": ("%,.0f %%", "{:,.0f} %"),
+    "aantal": ("%,d", "{:,.0f}"),
+    "lm": ("%,.2f LM", "{:,.2f} LM"),
+    "decimaal": ("%,.2f", "{:,.2f}"),
+}
+
+
+def kolomopmaak(formaten: dict) -> dict:
+    """column_config voor st.dataframe: {kolom: naam van het formaat}."""
+    return {
+        kolom: st.column_config.NumberColumn(format=FORMATEN[naam][0])
+        for kolom, naam in formaten.items()
+    }
+
+
+def formatteer(waarde, naam: str) -> str:
+    """Eén waarde als tekst, in hetzelfde formaat als in de tabellen."""
+    return FORMATEN[naam][1].format(waarde)
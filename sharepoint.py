@@ -0,0 +1,102 @@
+"""Ophalen van Excel-bestanden via een SharePoint-deel-link.
+
+Alle Streamlit-sessies in hetzelfde serverproces delen één requests.Session
+(met connection pooling) en één cache per URL. Binnen de TTL wordt de
+gecachte inhoud teruggegeven zonder netwerkverkeer; daarna wordt met
+If-None-Match / If-Modified-Since nagevraagd of het bestand gewijzigd is,
+zodat een ongewijzigd bestand met een 304 afgehandeld wordt."""
+import hashlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+STANDAARD_TTL = 300  # seconden dat een opgehaald bestand zonder navraag geldig blijft
+TIMEOUT = 15
+
+_sessie = None
+_sessie_lock = threading.Lock()
+
+# url -> {"inhoud", "versie", "etag", "last_modified", "opgehaald"}
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def geef_sessie() -> requests.Session:
+    """Geeft de gedeelde requests.Session terug (wordt bij het eerste gebruik
+    aangemaakt), zodat TCP/TLS-verbindingen hergebruikt worden."""
+    global _sessie
+    with _sessie_lock:
+        if _sessie is None:
+            sessie = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            sessie.mount("https://", adapter)
+            sessie.mount("http://", adapter)
+            _sessie = sessie
+        return _sessie
+
+
+def bouw_download_url(url: str) -> str:
+    """Voegt 'download=1' toe aan een deel-link zodat SharePoint het bestand
+    zelf teruggeeft in plaats van de webviewer."""
+    return url + ("&download=1" if "?" in url else "?download=1")
+
+
+def haal_sharepoint_excel_op(
+    url: str, ttl: float = STANDAARD_TTL, sessie: requests.Session | None = None
+) -> tuple[bytes, str]:
+    """Probeert een Excel-bestand rechtstreeks van een SharePoint-deel-link
+    te downloaden en geeft (inhoud, versie) terug; 'versie' is een hash van
+    de inhoud en verandert enkel als het bestand zelf verandert.
+    Werkt enkel als de link 'iedereen met de link'-toegang heeft; bij een
+    link die login vereist, komt er een HTML-loginpagina terug in plaats
+    van het bestand, en gooien we een duidelijke fout."""
+    nu = time.monotonic()
+    with _cache_lock:
+        item = _cache.get(url)
+
+    if item is not None and nu - item["opgehaald"] < ttl:
+        return item["inhoud"], item["versie"]
+
+    headers = {}
+    if item is not None:
+        if item["etag"]:
+            headers["If-None-Match"] = item["etag"]
+        if item["last_modified"]:
+            headers["If-Modified-Since"] = item["last_modified"]
+
+    sessie = sessie or geef_sessie()
+    resp = sessie.get(bouw_download_url(url), headers=headers, timeout=TIMEOUT)
+
+    if resp.status_code == 304 and item is not None:
+        item = {**item, "opgehaald": nu}
+    else:
+        resp.raise_for_status()
+
+        content_type = resp.headers.get("Content-Type", "").lower()
+        if "html" in content_type:
+            raise ValueError(
+                "SharePoint gaf een inlogpagina terug in plaats van het bestand. "
+                "Automatisch ophalen werkt enkel als de link is ingesteld op "
+                "'Iedereen met de link'. Gebruik anders de handmatige upload hieronder."
+            )
+
+        inhoud = resp.content
+        item = {
+            "inhoud": inhoud,
+            "versie": hashlib.sha1(inhoud).hexdigest(),
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "opgehaald": nu,
+        }
+
+    with _cache_lock:
+        _cache[url] = item
+    return item["inhoud"], item["versie"]
+
+
+def wis_cache() -> None:
+    """Vergeet alle eerder opgehaalde bestanden (volgende oproep downloadt opnieuw)."""
+    with _cache_lock:
+        _cache.clear()
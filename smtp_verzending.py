@@ -0,0 +1,164 @@
+"""Rechtstreeks verzenden van de opgebouwde overzichtsmails via SMTP.
+
+Een vast aantal werkers (begrensde parallelliteit) houdt elk één
+SMTP-verbinding open en verstuurt daarlangs na elkaar meerdere berichten.
+Tijdelijke fouten (4xx-antwoorden, verbroken verbinding) worden met
+oplopende wachttijd opnieuw geprobeerd; een optionele snelheidsbegrenzer
+houdt het aantal berichten per seconde onder de limiet van de mailserver."""
+import email
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email import policy
+from email.message import EmailMessage
+
+STANDAARD_POGINGEN = 3
+STANDAARD_WACHTTIJD = 2.0  # seconden voor de eerste herhaling, daarna verdubbeld
+TIMEOUT = 30
+MAX_REGELLENGTE = 998  # RFC 5321: langere regels worden door mailservers geweigerd
+
+
+def maak_bericht(eml_bytes: bytes, afzender: str) -> EmailMessage:
+    """Zet een .eml-concept (zie bouw_eml) om naar een verzendbaar bericht:
+    de 'From' wordt ingevuld en de concept-markering X-Unsent verwijderd.
+    Tekstdelen met te lange regels (de HTML-tabel staat op één regel)
+    worden als quoted-printable gecodeerd."""
+    bericht = email.message_from_bytes(eml_bytes, policy=policy.default)
+    for deel in bericht.walk():
+        if deel.get_content_maintype() != "text":
+            continue
+        inhoud = deel.get_content()
+        if any(len(regel) > MAX_REGELLENGTE for regel in inhoud.splitlines()):
+            deel.set_content(inhoud, subtype=deel.get_content_subtype(), cte="quoted-printable")
+    del bericht["X-Unsent"]
+    del bericht["From"]
+    bericht["From"] = afzender
+    return bericht
+
+
+class _Snelheidsbegrenzer:
+    """Verdeelt verzendmomenten gelijkmatig over alle werkers, zodat er
+    nooit meer dan 'per_seconde' berichten per seconde vertrekken."""
+
+    def __init__(self, per_seconde: float | None):
+        self.interval = 1.0 / per_seconde if per_seconde else 0.0
+        self.volgende = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wacht(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            moment = max(self.volgende, time.monotonic())
+            self.volgende = moment + self.interval
+        vertraging = moment - time.monotonic()
+        if vertraging > 0:
+            time.sleep(vertraging)
+
+
+def _is_tijdelijk(fout: Exception) -> bool:
+    """Tijdelijke fouten (verbinding weg, 4xx zoals 421/450/451/452 bij
+    rate limiting) mogen opnieuw geprobeerd worden; 5xx niet."""
+    if isinstance(fout, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(fout, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in fout.recipients.values())
+    if isinstance(fout, smtplib.SMTPResponseException):
+        return 400 <= fout.smtp_code < 500
+    return False
+
+
+def verzend_mails(
+    berichten: list,
+    *,
+    host: str,
+    port: int = 587,
+    gebruiker: str | None = None,
+    wachtwoord: str | None = None,
+    starttls: bool = True,
+    max_verbindingen: int = 4,
+    max_per_seconde: float | None = None,
+    pogingen: int = STANDAARD_POGINGEN,
+    wachttijd: float = STANDAARD_WACHTTIJD,
+    voortgang=None,
+) -> list[dict]:
+    """Verstuurt alle berichten [(sleutel, EmailMessage), ...] over hoogstens
+    'max_verbindingen' gelijktijdige SMTP-verbindingen, die elk hergebruikt
+    worden voor meerdere berichten. Geeft per bericht een status terug
+    (in de volgorde van 'berichten'). 'voortgang' wordt vanuit de
+    aanroepende thread aangeroepen met (aantal klaar, totaal)."""
+    totaal = len(berichten)
+    if totaal == 0:
+        return []
+
+    wachtrij = queue.Queue()
+    for i, item in enumerate(berichten):
+        wachtrij.put((i, item))
+    resultaten = queue.Queue()
+    begrenzer = _Snelheidsbegrenzer(max_per_seconde)
+
+    def verbind() -> smtplib.SMTP:
+        smtp = smtplib.SMTP(host, port, timeout=TIMEOUT)
+        try:
+            if starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if gebruiker:
+                smtp.login(gebruiker, wachtwoord or "")
+        except Exception:
+            smtp.close()  # anders blijft de socket open tot de garbage collector
+            raise
+        return smtp
+
+    def werker() -> None:
+        smtp = None
+        try:
+            while True:
+                try:
+                    i, (sleutel, bericht) = wachtrij.get_nowait()
+                except queue.Empty:
+                    return
+
+                status = {"Sleutel": sleutel, "Status": "Mislukt", "Pogingen": 0, "Fout": ""}
+                for poging in range(1, pogingen + 1):
+                    status["Pogingen"] = poging
+                    try:
+                        if smtp is None:
+                            smtp = verbind()
+                        begrenzer.wacht()
+                        smtp.send_message(bericht)
+                        status["Status"] = "Verzonden"
+                        status["Fout"] = ""
+                        break
+                    except Exception as e:
+                        status["Fout"] = str(e)
+                        if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(
+                            e, smtplib.SMTPException
+                        ):
+                            smtp = None  # verbinding is onbruikbaar, volgende poging verbindt opnieuw
+                        if poging == pogingen or not _is_tijdelijk(e):
+                            break
+                        time.sleep(wachttijd * 2 ** (poging - 1))
+                resultaten.put((i, status))
+        finally:
+            if smtp is not None:
+                try:
+                    smtp.quit()
+                except Exception:
+                    pass
+
+    statussen = [None] * totaal
+    aantal_werkers = max(1, min(max_verbindingen, totaal))
+    with ThreadPoolExecutor(max_workers=aantal_werkers) as pool:
+        werkers = [pool.submit(werker) for _ in range(aantal_werkers)]
+        for klaar in range(1, totaal + 1):
+            i, status = resultaten.get()
+            statussen[i] = status
+            if voortgang is not None:
+                voortgang(klaar, totaal)
+        for w in werkers:
+            w.result()
+
+    return statussen
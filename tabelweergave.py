@@ -0,0 +1,54 @@
+"""Gepagineerde weergave van grote tabellen (brongegevens, detailtabellen).
+
+st.dataframe(df) of st.write(df) stuurt de volledige DataFrame naar elke
+browsersessie. toon_gepagineerd() stuurt enkel de zichtbare pagina, met
+een keuze van kolommen en een eenvoudige tekstfilter. Het is een fragment:
+bladeren of filteren voert enkel deze weergave opnieuw uit, niet het hele
+script.
+
+    toon_gepagineerd(df, "bron")
+    toon_gepagineerd(detail, "nul_omzet", hide_index=True, column_config=...)"""
+import math
+
+import pandas as pd
+import streamlit as st
+
+RIJEN_PER_PAGINA = 100
+
+
+@st.fragment
+def toon_gepagineerd(df: pd.DataFrame, sleutel: str, rijen_per_pagina: int = RIJEN_PER_PAGINA, **dataframe_opties):
+    """Toont 'df' per pagina van 'rijen_per_pagina' rijen. 'sleutel' maakt
+    de widgets uniek als er meerdere tabellen op één pagina staan; de
+    overige argumenten gaan naar st.dataframe."""
+    alle_kolommen = list(df.columns)
+    kolommen = st.multiselect("Kolommen", alle_kolommen, default=alle_kolommen, key=f"{sleutel}_kolommen")
+    if not kolommen:
+        st.info("Selecteer minstens één kolom.")
+        return
+
+    col1, col2 = st.columns(2)
+    filterkolom = col1.selectbox(
+        "Filter op kolom",
+        [None, *kolommen],
+        format_func=lambda kolom: "(geen filter)" if kolom is None else str(kolom),
+        key=f"{sleutel}_filterkolom",
+    )
+    zoekterm = col2.text_input("Bevat", key=f"{sleutel}_zoekterm", disabled=filterkolom is None)
+    if filterkolom is not None and zoekterm:
+        df = df[df[filterkolom].astype(str).str.contains(zoekterm, case=False, regex=False, na=False)]
+
+    aantal = len(df)
+    paginas = max(1, math.ceil(aantal / rijen_per_pagina))
+    paginasleutel = f"{sleutel}_pagina"
+    # Na een strengere filter kan de vorige pagina niet meer bestaan
+    if st.session_state.get(paginasleutel, 1) > paginas:
+        st.session_state[paginasleutel] = paginas
+    pagina = st.number_input(f"Pagina (van {paginas})", min_value=1, max_value=paginas, step=1, key=paginasleutel)
+
+    start = (pagina - 1) * rijen_per_pagina
+    st.dataframe(df.iloc[start:start + rijen_per_pagina][kolommen], **dataframe_opties)
+    if aantal:
+        st.caption(f"Rijen {start + 1}–{min(start + rijen_per_pagina, aantal)} van {aantal}")
+    else:
+        st.caption("Geen rijen.")
@@ -0,0 +1,130 @@
+"""Tijdstippen (Arrival/Departure) omzetten naar seconden na middernacht.
+
+Een tijdkolom uit Excel kan van alles bevatten, afhankelijk van de engine
+en van hoe de cel opgemaakt is: datetime.time-objecten (openpyxl), tekst
+zoals "14:58:00" (calamine, of ingetypt), volledige datums met tijd, of
+het Excel-getal zelf (fractie van een dag). tijd_in_seconden() zet elk van
+die vormen in bulk om, zonder elke cel eerst naar tekst om te zetten en
+opnieuw te parsen:
+
+    tijd                     -> uur * 3600 + minuut * 60 + seconde
+    tekst "HH:MM[:SS]"       -> pyarrow strptime (als pyarrow beschikbaar is)
+    datum met tijd           -> enkel het tijdstip telt
+    getal                    -> (getal % 1) * 86400
+
+Lege of onleesbare waarden worden NaN. wachttijd() rekent daarmee de
+wachttijd per rij uit; een vertrek vóór de aankomst wordt gelezen als een
+vertrek na middernacht (+24 u)."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # zonder pyarrow enkel de (tragere) pandas-parser
+    pa = None
+
+DAG = 24 * 3600
+
+# 1900-01-01 in seconden sinds 1970: de datum die strptime invult bij enkel een tijd
+BEGIN_1900 = -2208988800
+
+# Tekstformaten voor de snelle weg, in volgorde van voorkeur
+TEKSTFORMATEN = ["%H:%M:%S", "%H:%M"]
+
+
+def tijd_in_seconden(waarden: pd.Series) -> pd.Series:
+    """Seconden na middernacht per rij (float); NaN voor lege of ongeldige
+    waarden en voor tijden buiten 00:00-24:00."""
+    if pd.api.types.is_timedelta64_dtype(waarden):
+        seconden = waarden.dt.total_seconds().to_numpy()
+    elif pd.api.types.is_datetime64_any_dtype(waarden):
+        seconden = (waarden - waarden.dt.normalize()).dt.total_seconds().to_numpy()
+    elif pd.api.types.is_bool_dtype(waarden):
+        seconden = np.full(len(waarden), np.nan)
+    elif pd.api.types.is_numeric_dtype(waarden):
+        # Excel-getal: het deel na de komma is het tijdstip. Afronden op de
+        # microseconde, want 14:58 is in Excel 0.62361111...
+        getallen = waarden.to_numpy(dtype=float, na_value=np.nan)
+        seconden = np.where(getallen >= 0, ((getallen % 1) * DAG).round(6), np.nan)
+    elif pd.api.types.is_object_dtype(waarden):
+        seconden = _gemengd_in_seconden(waarden)
+    else:
+        seconden = _tekst_in_seconden(waarden)
+    seconden = np.where((seconden >= 0) & (seconden < DAG), seconden, np.nan)
+    return pd.Series(seconden, index=waarden.index)
+
+
+def _tekst_in_seconden(tekst: pd.Series) -> np.ndarray:
+    seconden = np.full(len(tekst), np.nan)
+    if pa is not None:
+        waarden = pa.array(tekst.array)
+        for formaat in TEKSTFORMATEN:
+            tijdstip = pc.strptime(waarden, format=formaat, unit="s", error_is_null=True)
+            gelezen = pc.subtract(pc.cast(tijdstip, pa.int64()), BEGIN_1900).to_numpy(zero_copy_only=False)
+            seconden = np.where(np.isnan(seconden), gelezen, seconden)
+            if not np.isnan(seconden).any():
+                return seconden
+
+    # Wat overblijft (spaties, fracties van seconden, datum met tijd, ...) via pandas
+    rest = np.isnan(seconden) & tekst.notna().to_numpy()
+    if rest.any():
+        duur = pd.to_timedelta(tekst[rest].str.strip(), errors="coerce")
+        seconden[rest] = duur.dt.total_seconds().to_numpy()
+        rest[rest] = duur.isna().to_numpy()
+    if rest.any():
+        datums = pd.to_datetime(tekst[rest].str.strip(), errors="coerce", format="mixed")
+        seconden[rest] = (datums - datums.dt.normalize()).dt.total_seconds().to_numpy()
+    return seconden
+
+
+def _gemengd_in_seconden(waarden: pd.Series) -> np.ndarray:
+    """Object-kolom met gemengde waarden: elk soort waarden in één keer."""
+    seconden = np.full(len(waarden), np.nan)
+    soort = waarden.map(type).to_numpy()
+
+    tijden = soort == datetime.time
+    if tijden.any():
+        seconden[tijden] = np.fromiter(
+            (t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6 for t in waarden[tijden]),
+            dtype=float,
+            count=int(tijden.sum()),
+        )
+
+    tekst = soort == str
+    if tekst.any():
+        seconden[tekst] = _tekst_in_seconden(waarden[tekst].astype("str"))
+
+    # datetime/Timestamp (of date) en getallen
+    rest = ~tijden & ~tekst & waarden.notna().to_numpy()
+    if rest.any():
+        datums = rest & waarden.map(lambda w: isinstance(w, datetime.date)).to_numpy()
+        getallen = rest & ~datums & (soort != bool)
+        if datums.any():
+            seconden[datums] = tijd_in_seconden(pd.to_datetime(waarden[datums], errors="coerce")).to_numpy()
+        if getallen.any():
+            seconden[getallen] = tijd_in_seconden(pd.to_numeric(waarden[getallen], errors="coerce")).to_numpy()
+    return seconden
+
+
+def wachttijd(aankomst: pd.Series, vertrek: pd.Series) -> pd.DataFrame:
+    """Wachttijd per rij tussen aankomst en vertrek (enkel het tijdstip
+    telt). Kolommen:
+
+        Wait_Hours        wachttijd in uren (NaN als een tijd ongeldig is)
+        Over_Middernacht  vertrek vóór aankomst, dus na middernacht (+24 u)
+        Tijd_Ongeldig     aankomst of vertrek leeg of onleesbaar"""
+    van = tijd_in_seconden(aankomst).to_numpy()
+    tot = tijd_in_seconden(vertrek).to_numpy()
+    over_middernacht = tot < van
+    duur = np.where(over_middernacht, tot + DAG, tot) - van
+    return pd.DataFrame(
+        {
+            "Wait_Hours": duur / 3600,
+            "Over_Middernacht": over_middernacht,
+            "Tijd_Ongeldig": np.isnan(duur),
+        },
+        index=aankomst.index,
+    )
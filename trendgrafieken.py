@@ -0,0 +1,125 @@
+"""Trendgrafieken van wachturen en laadmeters per klant voor CSGenk.py.
+
+Over meerdere maanden (of jaren) aan ritten worden de grafieken anders
+al snel tienduizenden punten groot. Daarom gebeurt alles wat kan op de
+server:
+
+    maak_trends(ritten)     -> per resolutie (Dag/Week/Maand) één keer
+                               geaggregeerd per periode en klant
+    verdun(x, y, punten)    -> per reeks hoogstens 'punten' punten: per
+                               vak enkel het minimum en maximum, zodat
+                               pieken zichtbaar blijven
+    trendfiguur(...)        -> Plotly-figuur met Scattergl (WebGL), die
+                               ook veel punten vlot tekent
+
+toon_trends() is een fragment: een andere resolutie, maatstaf of klant
+kiezen tekent enkel de grafiek opnieuw."""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# Weergavenaam -> begin van de periode, voor een reeks dagen
+RESOLUTIES = {
+    "Dag": lambda dagen: dagen,
+    "Week": lambda dagen: dagen - pd.to_timedelta(dagen.dt.weekday, unit="D"),
+    "Maand": lambda dagen: dagen.dt.to_period("M").dt.start_time,
+}
+
+# Kolom in de trendtabel -> titel van de grafiek
+MAATSTAVEN = {
+    "Gem. Wachturen (u)": "Gemiddelde wachturen per rit",
+    "Totaal LM": "Laadmeters",
+}
+
+# Maximum aantal punten in één grafiek, verdeeld over de getoonde klanten.
+# Zodat elke klant minstens MIN_PUNTEN_PER_KLANT punten krijgt, kunnen
+# hoogstens MAX_KLANTEN klanten tegelijk gekozen worden.
+MAX_PUNTEN = 4000
+MIN_PUNTEN_PER_KLANT = 200
+MAX_KLANTEN = MAX_PUNTEN // MIN_PUNTEN_PER_KLANT
+
+# Standaard getoonde klanten (meeste laadmeters)
+STANDAARD_KLANTEN = 10
+
+
+def maak_trends(ritten: pd.DataFrame) -> dict:
+    """Trendtabel per resolutie, uit de rittentabel van CSGenk.py (één rij
+    per rit met Date, Client, Wait_Hours en LM). Kolommen: Periode (begin
+    van de dag/week/maand), Client, Gem. Wachturen (u), Totaal LM, Ritten.
+
+    Enkel de dagtabel wordt uit de ritten berekend; weken en maanden
+    worden daaruit opgeteld (som en aantal wachturen, zodat het gemiddelde
+    per rit blijft kloppen)."""
+    per_dag = ritten.groupby([ritten['Date'].dt.floor('D').rename('Periode'), 'Client'], observed=True).agg(
+        Wachturen=('Wait_Hours', 'sum'),
+        Gewacht=('Wait_Hours', 'count'),
+        LM=('LM', 'sum'),
+        Ritten=('Tripnr', 'size'),
+    ).reset_index()
+
+    trends = {}
+    for naam, begin in RESOLUTIES.items():
+        per_periode = per_dag.groupby([begin(per_dag['Periode']), 'Client'], observed=True)[
+            ['Wachturen', 'Gewacht', 'LM', 'Ritten']
+        ].sum()
+        trends[naam] = pd.DataFrame({
+            'Gem. Wachturen (u)': per_periode['Wachturen'] / per_periode['Gewacht'].where(per_periode['Gewacht'] > 0),
+            'Totaal LM': per_periode['LM'],
+            'Ritten': per_periode['Ritten'],
+        }).reset_index()
+    return trends
+
+
+def verdun(x: np.ndarray, y: np.ndarray, max_punten: int) -> tuple[np.ndarray, np.ndarray]:
+    """Hoogstens 'max_punten' punten van een reeks (gesorteerd op x). De
+    reeks wordt in max_punten / 2 vakken verdeeld; per vak blijven het
+    laagste en het hoogste punt over. Punten zonder waarde vallen weg."""
+    geldig = np.flatnonzero(~np.isnan(y))
+    if len(geldig) <= max_punten:
+        return x[geldig], y[geldig]
+
+    vak = np.arange(len(geldig)) * (max_punten // 2) // len(geldig)
+    per_vak = pd.Series(y[geldig]).groupby(vak)
+    posities = geldig[np.union1d(per_vak.idxmin().to_numpy(), per_vak.idxmax().to_numpy())]
+    return x[posities], y[posities]
+
+
+def trendfiguur(trend: pd.DataFrame, kolom: str, klanten: list, max_punten: int = MAX_PUNTEN) -> go.Figure:
+    """Eén lijn per klant voor 'kolom', samen hoogstens 'max_punten'
+    punten."""
+    per_klant = max_punten // max(1, len(klanten))
+    figuur = go.Figure()
+    for klant, reeks in trend[trend['Client'].isin(klanten)].groupby('Client', observed=True):
+        reeks = reeks.sort_values('Periode')
+        x, y = verdun(reeks['Periode'].to_numpy(), reeks[kolom].to_numpy(dtype=float), per_klant)
+        figuur.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=str(klant)))
+    figuur.update_layout(
+        title=MAATSTAVEN[kolom],
+        yaxis_title=kolom,
+        hovermode="x unified",
+        margin=dict(t=50, b=20),
+    )
+    return figuur
+
+
+@st.fragment
+def toon_trends(trends: dict, sleutel: str = "trends"):
+    """Keuze van resolutie, maatstaf en klanten, en de grafiek."""
+    col1, col2 = st.columns(2)
+    resolutie = col1.radio("Resolutie", list(RESOLUTIES), index=2, horizontal=True, key=f"{sleutel}_resolutie")
+    kolom = col2.radio("Maatstaf", list(MAATSTAVEN), horizontal=True, key=f"{sleutel}_maatstaf")
+    trend = trends[resolutie]
+
+    alle_klanten = list(trend.groupby('Client', observed=True)['Totaal LM'].sum().sort_values(ascending=False).index)
+    klanten = st.multiselect(
+        "Klanten",
+        alle_klanten,
+        default=alle_klanten[:STANDAARD_KLANTEN],
+        max_selections=MAX_KLANTEN,
+        key=f"{sleutel}_klanten",
+    )
+    if not klanten:
+        st.info("Selecteer minstens één klant.")
+        return
+    st.plotly_chart(trendfiguur(trend, kolom, klanten), use_container_width=True)